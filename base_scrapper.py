@@ -1,40 +1,449 @@
 import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 import pandas as pd
-from requests.exceptions import HTTPError
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError, RequestException
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from tqdm import tqdm
+from metrics import run_metrics
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard json module
+    orjson = None
 
 import logging
 logging.basicConfig(level=logging.INFO)
 
-# base url
-def get_data(top_level_key, session, timeout=10):
+# FPL_API_URL can point the scrapper at a mirror or a local stub server
+API_URL = os.getenv("FPL_API_URL", "https://fantasy.premierleague.com/api").rstrip('/')
+BOOTSTRAP_URL = f'{API_URL}/bootstrap-static/'
+ELEMENT_SUMMARY_URL = API_URL + '/element-summary/{player_id}/'
+
+# status codes worth retrying, anything else is returned as a failure straight away
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# FPL_HTTP_CACHE: off, on (revalidate with ETag/Last-Modified) or offline (replay only)
+HTTP_CACHE_MODES = ('off', 'on', 'offline')
+HTTP_CACHE_PATH = os.getenv("FPL_HTTP_CACHE_PATH", "cache/http_cache.sqlite")
+
+
+def decode_json(body):
     """
-    Function to scrap data from Fanatsy API
+    Parse a JSON response body straight from bytes, with orjson when it is
+    installed, skipping the bytes to str decode of response.text
+    """
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def encode_json(value):
+    """
+    Serialize a value to compact JSON text, with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(',', ':'))
+
+
+class ColumnBuilder:
+    """
+    Collects JSON records as one list per column, so a DataFrame is built
+    from a dict of lists rather than from a list of small dicts. Columns
+    are ordered by first appearance and keys missing from a record are
+    padded with NaN, as pd.DataFrame(records) does.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def _add_columns(self, keys):
+        for key in keys:
+            if key not in self.columns:
+                self.columns[key] = [float('nan')] * self.rows
+
+    def extend(self, records):
+        """
+        Append records, a list of dicts. A list whose records share the
+        keys of the first one is transposed in one go.
+        """
+        if not records:
+            return
+        keys = tuple(records[0])
+        try:
+            if len(keys) < 2 or any(len(record) != len(keys) for record in records):
+                raise KeyError
+            values = zip(*map(itemgetter(*keys), records))
+        except KeyError:
+            for record in records:
+                self.append(record)
+            return
+
+        self._add_columns(keys)
+        for key, column_values in zip(keys, values):
+            self.columns[key].extend(column_values)
+        if len(keys) != len(self.columns):
+            for key, column in self.columns.items():
+                if key not in keys:
+                    column.extend([float('nan')] * len(records))
+        self.rows += len(records)
+
+    def append(self, record):
+        """Append a single record, a dict"""
+        self._add_columns(record)
+        for key, column in self.columns.items():
+            column.append(record.get(key, float('nan')))
+        self.rows += 1
+
+    def __len__(self):
+        return self.rows
+
+
+class CacheMiss(RequestException):
+    """Raised in offline mode for a url that was never cached"""
+
+
+class HttpCache:
+    """
+    On disk store of GET responses (body, ETag, Last-Modified) in sqlite
+
+    In 'on' mode cached urls are revalidated with a conditional request and
+    a 304 is answered from disk, in 'offline' mode responses are replayed
+    from disk without touching the network and a url that was never cached
+    raises CacheMiss. 'off' leaves every request alone.
 
     Args:
-        top_level_key: available keys eg. 'elements' for player data
+        path: sqlite file, created on first use
+        mode: one of HTTP_CACHE_MODES
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, mode='off'):
+        self.path = path
+        self.mode = mode
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode):
+        if mode not in HTTP_CACHE_MODES:
+            raise ValueError(f"Unknown http cache mode: {mode}, expected one of {HTTP_CACHE_MODES}")
+        self._mode = mode
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def _db(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    fetched_at REAL NOT NULL)
+            """)
+        return self._connection
+
+    def get(self, url):
+        """Cached (headers, body) of a url, None if it was never cached"""
+        with self._lock:
+            row = self._db().execute("SELECT headers, body FROM responses WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return CaseInsensitiveDict(json.loads(row[0])), row[1]
+
+    def put(self, url, headers, body):
+        """Store the headers and body of a 200 response"""
+        with self._lock:
+            self._db().execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                               (url, json.dumps(dict(headers)), body, time.time()))
+            self._db().commit()
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._db().execute("DELETE FROM responses")
+            self._db().commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Transport adapter answering GET requests through an HttpCache and
+    the raw landing zone
+
+    Mounted on every session made by new_session(). While landing_zone is
+    set, every 200 body is landed, or in replay mode every request is
+    served from the landed files. It passes requests straight through
+    while the cache is off and nothing is landed.
+    """
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        zone = landing_zone
+        if request.method == 'GET' and zone is not None and zone.replay:
+            body = zone.load(request.url)
+            if body is None:
+                raise CacheMiss(f"{request.url} is not in the landing zone {zone.directory}", request=request)
+            response = self._cached_response(request, CaseInsensitiveDict({'Content-Type': 'application/json'}), body)
+            _record_request(request, response, 'landing', 0.0)
+            return response
+
+        start = time.perf_counter()
+        try:
+            response = self._send(request, **kwargs)
+            # the body is read here so the latency covers the download
+            content = response.content
+        except RequestException:
+            run_metrics.inc('http_errors_total', endpoint=_endpoint(request.url))
+            raise
+        _record_request(request, response, 'cache' if getattr(response, 'from_cache', False) else 'network',
+                        time.perf_counter() - start)
+
+        if request.method == 'GET' and zone is not None and response.status_code == 200:
+            zone.save(request.url, content)
+        return response
+
+    def _send(self, request, **kwargs):
+        if request.method != 'GET' or not self.cache.enabled:
+            return super().send(request, **kwargs)
+
+        cached = self.cache.get(request.url)
+        if self.cache.mode == 'offline':
+            if cached is None:
+                raise CacheMiss(f"{request.url} is not in the http cache (offline mode)", request=request)
+            return self._cached_response(request, *cached)
+
+        if cached is not None:
+            headers, _ = cached
+            if 'ETag' in headers:
+                request.headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            return self._cached_response(request, *cached)
+        if response.status_code == 200:
+            self.cache.put(request.url, response.headers, response.content)
+        return response
+
+    @staticmethod
+    def _cached_response(request, headers, body):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        return response
+
+
+def _endpoint(url):
+    """API endpoint of a request url, eg. 'element-summary'"""
+    path = url[len(API_URL):] if url.startswith(API_URL) else url
+    return path.strip('/').split('/')[0] or 'other'
+
+
+def _record_request(request, response, source, seconds):
+    """Add a response to the HTTP metrics of the run"""
+    labels = {'endpoint': _endpoint(request.url), 'source': source}
+    run_metrics.inc('http_requests_total', status=response.status_code, **labels)
+    run_metrics.inc('http_bytes_total', len(response.content), **labels)
+    if source != 'landing':
+        run_metrics.observe('http_request_seconds', seconds, **labels)
+
+
+# shared cache behind every session, FPL_HTTP_CACHE picks the mode
+http_cache = HttpCache(mode=os.getenv("FPL_HTTP_CACHE", "off"))
+
+# landing.LandingZone raw responses are landed in (or replayed from), None lands nothing
+landing_zone = None
+
+
+def offline():
+    """True while requests are answered from disk, so no rate limit is needed"""
+    return http_cache.mode == 'offline' or (landing_zone is not None and landing_zone.replay)
+
+
+def new_session():
+    """
+    requests session whose GETs go through the shared http cache
 
     Returns:
-        A pandas dataframe
+        requests.Session
     """
-    url = 'https://fantasy.premierleague.com/api/bootstrap-static/'
+    session = requests.Session()
+    adapter = CachingAdapter(http_cache)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
-    try:
-        response = session.get(url, timeout=timeout)
-        response.raise_for_status()  # raise http error if one occurs
 
-        data = response.json()
+class BootstrapSnapshot:
+    """
+    Holds one parsed copy of the bootstrap-static payload
+
+    The payload carries every top level key (elements, events, teams,
+    element_types ...) so it is downloaded once and each getter takes
+    its slice from the cached copy instead of fetching it again. Every
+    download is also written to path, so a later run in a new process
+    (each Prefect flow run is one) can reuse it inside the ttl window.
+
+    Args:
+        ttl: seconds a snapshot may be reused by a later run,
+             None keeps it until invalidate() is called
+        path: file the downloaded payload is kept in, None keeps it in memory only
+    """
+
+    def __init__(self, ttl=None, path=None):
+        self.ttl = ttl
+        self.path = path
+        self._data = None
+        self._fetched_at = None
+
+    @property
+    def age(self):
+        """Seconds since the payload was fetched, None if nothing is cached"""
+        if self._fetched_at is None:
+            return None
+        return time.time() - self._fetched_at
+
+    def is_fresh(self, ttl=None):
+        """Check whether the cached payload is still within the ttl"""
+        ttl = self.ttl if ttl is None else ttl
+        if self._data is None:
+            return False
+        return ttl is None or self.age <= ttl
+
+    def invalidate(self):
+        """Drop the cached payload so the next access fetches it again"""
+        self._data = None
+        self._fetched_at = None
+
+    def expire(self, ttl=None):
+        """
+        Drop the cached payload if it is older than ttl
+
+        Called at the start of a run, a snapshot fetched by a previous run
+        inside the ttl window is kept, read back from path when this
+        process has none, anything older is refetched.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and self._data is None:
+            self._restore()
+        if ttl is None or not self.is_fresh(ttl):
+            self.invalidate()
+
+    def _restore(self):
+        """Read the payload a previous run kept in path, its mtime is the fetch time"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            self._data = decode_json(f.read())
+        self._fetched_at = os.path.getmtime(self.path)
+
+    def _persist(self, body):
+        """Keep the payload in path, through a temporary file renamed into place"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(body)
+        os.replace(temporary, self.path)
+
+    def load(self, session, timeout=10):
+        """
+        Return the parsed payload, fetching it only if nothing is cached
+
+        Args:
+            session: requests session
+            timeout: request timeout in seconds
+
+        Returns:
+            dict of the full bootstrap-static payload
+        """
+        if self._data is None:
+            response = session.get(BOOTSTRAP_URL, timeout=timeout)
+            response.raise_for_status()  # raise http error if one occurs
 
-        # Extract your desired data
-        available_keys = data.keys()
+            self._data = decode_json(response.content)
+            self._fetched_at = time.time()
+            logging.info(f"Fetched bootstrap-static snapshot ({len(response.content)} bytes)")
+            # a replayed payload is not a fresh one, only live downloads are kept
+            if self.path and not offline():
+                self._persist(response.content)
+
+        return self._data
+
+    def frame(self, top_level_key, session, timeout=10):
+        """
+        Return one top level key of the payload as a pandas dataframe
+
+        Args:
+            top_level_key: available keys eg. 'elements' for player data
+
+        Returns:
+            A pandas dataframe
+        """
+        data = self.load(session, timeout=timeout)
         my_data = data.get(top_level_key, [])
 
         if not my_data:
-            print(f"Invalid key. Available keys are: {available_keys}")
+            print(f"Invalid key. Available keys are: {data.keys()}")
             raise ValueError("No data found in the response.")
 
-        df = pd.DataFrame(my_data)
+        return pd.DataFrame(my_data)
+
+
+# shared snapshot used by every getter in operations.py
+# FPL_BOOTSTRAP_TTL (seconds) lets back to back runs reuse the same payload,
+# kept in FPL_BOOTSTRAP_PATH between processes
+bootstrap_snapshot = BootstrapSnapshot(ttl=int(os.getenv("FPL_BOOTSTRAP_TTL", "0")) or None,
+                                       path=os.getenv("FPL_BOOTSTRAP_PATH", "cache/bootstrap-static.json"))
+
+
+def get_data(top_level_key, session, timeout=10):
+    """
+    Function to scrap data from Fanatsy API
+
+    The bootstrap-static payload is served from the shared snapshot, so
+    only the first call in a run goes over the network.
 
-        return df
+    Args:
+        top_level_key: available keys eg. 'elements' for player data
+
+    Returns:
+        A pandas dataframe
+    """
+    try:
+        return bootstrap_snapshot.frame(top_level_key, session, timeout=timeout)
     
     except HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -44,30 +453,156 @@ def get_data(top_level_key, session, timeout=10):
         return pd.DataFrame()
 
 
-def fetch_player_data(player_id, session):
+class TokenBucket:
+    """
+    Thread safe token bucket limiting requests per second
+
+    Args:
+        rate: tokens added per second
+        capacity: burst size, defaults to one second worth of tokens
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _backoff_delay(attempt, backoff, response=None):
+    """
+    Seconds to wait before the next attempt, full jitter on an exponential
+    backoff unless the server sent a Retry-After header
+    """
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after is not None:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+def fetch_player_data(player_id, session, timeout=10, retries=3, backoff=0.5, limiter=None):
     """
     Function for fetching individual player data (fixtures, history, history_past)
-    
+
+    429 and 5xx responses as well as connection errors and timeouts are
+    retried with jittered exponential backoff.
+
     Args:
-        Individual player ids and session
+        player_id: individual player id
+        session: requests session
+        timeout: request timeout in seconds
+        retries: number of retries after the first attempt
+        backoff: base backoff in seconds
+        limiter: optional TokenBucket shared between workers
 
     Returns:
-        pandas dataframe
+        dict of the element-summary payload, None if the request failed
     """
-    base_url = f"https://fantasy.premierleague.com/api/element-summary/{player_id}/"
-    response = session.get(base_url)
-    if response.status_code == 200:
-        return json.loads(response.text)
-    else:
+    base_url = ELEMENT_SUMMARY_URL.format(player_id=player_id)
+
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            response = session.get(base_url, timeout=timeout)
+        except CacheMiss as e:
+            print(f"Failed to fetch data for player_id {player_id}. Error: {e}")
+            run_metrics.inc('http_failures_total', reason='cache_miss')
+            return None
+        except RequestException as e:
+            if attempt == retries:
+                print(f"Failed to fetch data for player_id {player_id}. Error: {e}")
+                run_metrics.inc('http_failures_total', reason='connection')
+                return None
+            run_metrics.inc('http_retries_total', reason='connection')
+            time.sleep(_backoff_delay(attempt, backoff))
+            continue
+
+        if response.status_code == 200:
+            return decode_json(response.content)
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+            logging.warning(f"Retrying player_id {player_id} after status code {response.status_code}")
+            run_metrics.inc('http_retries_total', reason=str(response.status_code))
+            time.sleep(_backoff_delay(attempt, backoff, response))
+            continue
+
         print(f"Failed to fetch data for player_id {player_id}. Status code: {response.status_code}")
+        run_metrics.inc('http_failures_total', reason=str(response.status_code))
         return None
 
 
+def iter_player_summaries(player_ids, concurrency=8, rps=None, timeout=10, retries=3, backoff=0.5):
+    """
+    Fetch element-summary payloads for many players concurrently and yield
+    them one by one, so a caller can consume each payload and let it go
+
+    Each worker thread keeps its own requests session, a shared token
+    bucket caps the overall request rate. Payloads come back in the order
+    of player_ids whatever order the requests complete in.
 
+    Args:
+        player_ids: list of player ids
+        concurrency: number of requests in flight at once
+        rps: maximum requests per second across all workers, None for no limit
+        timeout: per request timeout in seconds
+        retries: retries per player on 429/5xx/connection errors
+        backoff: base backoff in seconds
 
+    Yields:
+        payload dict (None where the fetch failed), aligned with player_ids
+    """
+    limiter = TokenBucket(rps) if rps and not offline() else None
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
 
+    def worker_session():
+        if not hasattr(local, 'session'):
+            local.session = new_session()
+            with sessions_lock:
+                sessions.append(local.session)
+        return local.session
 
+    def fetch(player_id):
+        return fetch_player_data(player_id, worker_session(), timeout=timeout,
+                                 retries=retries, backoff=backoff, limiter=limiter)
 
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            yield from tqdm(executor.map(fetch, player_ids), total=len(player_ids),
+                            desc="Fetching individual player summary data")
+    finally:
+        for worker in sessions:
+            worker.close()
 
 
+def fetch_player_summaries(player_ids, concurrency=8, rps=None, timeout=10, retries=3, backoff=0.5):
+    """
+    Fetch element-summary payloads for many players concurrently,
+    see iter_player_summaries
 
+    Returns:
+        list of payload dicts (None where the fetch failed), aligned with player_ids
+    """
+    return list(iter_player_summaries(player_ids, concurrency=concurrency, rps=rps, timeout=timeout,
+                                      retries=retries, backoff=backoff))
@@ -0,0 +1,105 @@
+"""
+element-summary decode and frame build, json + list of dicts vs orjson + column lists
+
+Usage:
+    python -m benchmarks.bench_decode --players 700
+    python -m benchmarks.bench_decode --landing landing/2024-10-05
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import time
+import tracemalloc
+
+import base_scrapper
+import operations
+from benchmarks.stub_server import synthetic_summary
+
+
+def load_bodies(args):
+    """Raw element-summary bodies, from a landing directory or synthetic"""
+    if args.landing:
+        paths = sorted(glob.glob(os.path.join(args.landing, 'element-summary', '*.json.gz')))
+        bodies = []
+        for path in paths:
+            with gzip.open(path, 'rb') as f:
+                bodies.append(f.read())
+        return bodies
+    return [json.dumps(synthetic_summary(player_id)).encode() for player_id in range(1, args.players + 1)]
+
+
+def records_path(bodies):
+    """The original path: json.loads(response.text), extend lists of dicts"""
+    fixtures, history, history_past = [], [], []
+    for body in bodies:
+        payload = json.loads(body.decode('utf-8'))
+        fixtures.extend(payload.get('fixtures', []))
+        history.extend(payload.get('history', []))
+        history_past.extend(payload.get('history_past', []))
+    return fixtures, history, history_past
+
+
+def columns_path(bodies):
+    """decode_json(response.content), records appended column by column"""
+    fixtures, history, history_past = (base_scrapper.ColumnBuilder() for _ in range(3))
+    for body in bodies:
+        payload = base_scrapper.decode_json(body)
+        fixtures.extend(payload.get('fixtures', []))
+        history.extend(payload.get('history', []))
+        history_past.extend(payload.get('history_past', []))
+    return fixtures.columns, history.columns, history_past.columns
+
+
+def frames(collected):
+    fixtures, history, history_past = collected
+    return (operations.fixtures_frame(fixtures), operations.history_frame(history),
+            operations.history_past_frame(history_past))
+
+
+def measure(path, bodies, repeat):
+    """Best of repeat timings for decode + collect and frame build, and the peak memory"""
+    parse_times, build_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        collected = path(bodies)
+        parsed = time.perf_counter()
+        result = frames(collected)
+        built = time.perf_counter()
+        del collected
+        parse_times.append(parsed - start)
+        build_times.append(built - parsed)
+
+    tracemalloc.start()
+    frames(path(bodies))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(parse_times), min(build_times), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=700)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--landing', help='landing directory of recorded payloads, eg. landing/2024-10-05')
+    args = parser.parse_args()
+
+    bodies = load_bodies(args)
+    old_parse, old_build, old_peak, old = measure(records_path, bodies, args.repeat)
+    new_parse, new_build, new_peak, new = measure(columns_path, bodies, args.repeat)
+
+    for before, after in zip(old, new):
+        assert before.equals(after), "column path frames differ from the records path"
+
+    print(f"payloads: {len(bodies)} ({sum(map(len, bodies)) / 1e6:.1f} MB), "
+          f"decoder: {'orjson' if base_scrapper.orjson else 'json'}")
+    print(f"decode + collect: {old_parse * 1000:.0f} ms -> {new_parse * 1000:.0f} ms "
+          f"({old_parse / new_parse:.1f}x)")
+    print(f"frame build:      {old_build * 1000:.0f} ms -> {new_build * 1000:.0f} ms "
+          f"({old_build / new_build:.1f}x)")
+    print(f"peak memory:      {old_peak / 1e6:.0f} MB -> {new_peak / 1e6:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
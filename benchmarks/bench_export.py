@@ -0,0 +1,78 @@
+"""
+CSV vs parquet export size and analyst reload time on synthetic current season rows
+
+Usage:
+    python -m benchmarks.bench_export --players 700 --gameweeks 38
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import generate_files
+import read_files
+
+
+def synthetic_rows(players, gameweeks, seed=0):
+    """Rows shaped like the current_season_stats export"""
+    rng = random.Random(seed)
+    kickoff = datetime(2024, 8, 16, 19, 0)
+    for player in range(players):
+        for gameweek in range(1, gameweeks + 1):
+            yield (f'Player {player}', f'P{player}', rng.choice(['GKP', 'DEF', 'MID', 'FWD']),
+                   f'{player}.jpg', f'Gameweek {gameweek}', kickoff + timedelta(days=7 * gameweek),
+                   f'Team {rng.randint(1, 20)}', rng.randint(-2, 20), rng.choice(['true', 'false']),
+                   rng.randint(0, 90), rng.randint(0, 3), rng.randint(0, 2), round(rng.random() * 100, 1),
+                   round(rng.random() * 2, 2), rng.randint(40, 140), rng.randint(0, 3_000_000))
+
+
+COLUMNS = ['NAME', 'WEB_NAME', 'POSITION_NAME', 'PHOTO', 'GAMEWEEK', 'KICKOFF_TIME', 'OPPONENT',
+           'TOTAL_POINTS', 'WAS_HOME', 'MINUTES', 'GOALS_SCORED', 'ASSISTS', 'INFLUENCE',
+           'EXPECTED_GOALS', 'VALUE', 'SELECTED']
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=700)
+    parser.add_argument('--gameweeks', type=int, default=38)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        csv_path = os.path.join(data_dir, 'current_season_stats.csv')
+        spool = generate_files.ExportSpool(COLUMNS)
+        rows = list(synthetic_rows(args.players, args.gameweeks))
+        for start in range(0, len(rows), generate_files.EXPORT_ARRAYSIZE):
+            spool.add(rows[start:start + generate_files.EXPORT_ARRAYSIZE])
+        spool.write(csv_path, formats=['csv', 'parquet'])
+        parquet_path = csv_path.replace('.csv', '.parquet')
+
+        csv_full, _ = timed(lambda: pd.read_csv(csv_path, parse_dates=['KICKOFF_TIME']), args.repeat)
+        parquet_full, _ = timed(lambda: read_files.read_current_season_data(data_dir=data_dir), args.repeat)
+        wanted = ['WEB_NAME', 'TOTAL_POINTS', 'EXPECTED_GOALS']
+        csv_cols, _ = timed(lambda: pd.read_csv(csv_path, usecols=wanted), args.repeat)
+        parquet_cols, _ = timed(lambda: read_files.read_current_season_data(columns=wanted, data_dir=data_dir),
+                                args.repeat)
+
+        print(f"rows: {len(rows)}")
+        print(f"size:         csv {os.path.getsize(csv_path) / 1e6:.2f} MB, "
+              f"parquet {os.path.getsize(parquet_path) / 1e6:.2f} MB ({generate_files.PARQUET_COMPRESSION})")
+        print(f"all columns:  csv {csv_full * 1000:.1f} ms, parquet {parquet_full * 1000:.1f} ms "
+              f"({csv_full / parquet_full:.1f}x)")
+        print(f"3 columns:    csv {csv_cols * 1000:.1f} ms, parquet {parquet_cols * 1000:.1f} ms "
+              f"({csv_cols / parquet_cols:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
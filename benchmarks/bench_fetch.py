@@ -0,0 +1,61 @@
+"""
+Sequential vs concurrent element-summary download against the local stub server
+
+Usage:
+    python -m benchmarks.bench_fetch --players 700 --latency 0.03 --concurrency 8 --rps 0
+"""
+import argparse
+import time
+
+import requests
+
+import base_scrapper
+from benchmarks.stub_server import StubFPLServer
+
+
+def point_scrapper_at(api_url):
+    """Redirect base_scrapper to another API root, eg. the stub server"""
+    base_scrapper.API_URL = api_url
+    base_scrapper.BOOTSTRAP_URL = f'{api_url}/bootstrap-static/'
+    base_scrapper.ELEMENT_SUMMARY_URL = api_url + '/element-summary/{player_id}/'
+
+
+def sequential(player_ids):
+    """The original one session, one request at a time loop"""
+    with requests.Session() as session:
+        return [base_scrapper.fetch_player_data(player_id, session, backoff=0.01) for player_id in player_ids]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=700)
+    parser.add_argument('--latency', type=float, default=0.03, help='stub server delay per response in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='fraction of 429 responses')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--rps', type=float, default=0, help='rate limit, 0 disables it')
+    args = parser.parse_args()
+
+    with StubFPLServer(players=args.players, latency=args.latency, error_rate=args.error_rate) as server:
+        point_scrapper_at(server.url)
+        player_ids = list(range(1, args.players + 1))
+
+        start = time.perf_counter()
+        baseline = sequential(player_ids)
+        sequential_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = base_scrapper.fetch_player_summaries(player_ids, concurrency=args.concurrency,
+                                                          rps=args.rps or None, backoff=0.01)
+        concurrent_seconds = time.perf_counter() - start
+
+    assert concurrent == baseline, "concurrent results differ from the sequential path"
+    assert all(payload is not None for payload in concurrent), "some player summaries failed"
+
+    print(f"players: {args.players}, latency: {args.latency}s, 429 rate: {args.error_rate}")
+    print(f"sequential:  {sequential_seconds:.2f}s")
+    print(f"concurrent:  {concurrent_seconds:.2f}s (concurrency={args.concurrency}, rps={args.rps or 'unlimited'})")
+    print(f"speedup:     {sequential_seconds / concurrent_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Row by row vs batched vs staging load of a history-sized table
+
+Runs against the Oracle database configured for dbconn.py, using scratch
+tables named bench_<strategy> that are dropped afterwards.
+
+Usage:
+    python -m benchmarks.bench_load --players 700 --gameweeks 38 --batch-size 1000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.stub_server import synthetic_summary
+from create_database_table import create_table_query
+from dbconn import connect_to_cloud_db
+from insert_update import upsert_insert_data, staging_merge_data, drop_staging_table
+
+
+def history_sample(players, gameweeks):
+    """Synthetic history rows with a single column key in front"""
+    rows = []
+    for player_id in range(1, players + 1):
+        rows.extend(synthetic_summary(player_id, gameweeks=gameweeks, finished=gameweeks)['history'])
+    df = pd.DataFrame(rows)
+    df.insert(0, 'row_id', df['element'] * 10000 + df['fixture'])
+    return df.drop_duplicates(subset='row_id')
+
+
+def run(strategy, table_name, df, cursor, batch_size):
+    if strategy == 'staging':
+        return staging_merge_data(table_name, df, cursor, ['row_id'], batch_size=batch_size)
+    return upsert_insert_data(table_name, df, cursor, batch_size if strategy == 'batch' else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=700)
+    parser.add_argument('--gameweeks', type=int, default=38)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--strategies', default='row,batch,staging')
+    args = parser.parse_args()
+
+    df = history_sample(args.players, args.gameweeks)
+    updated = df.assign(total_points=df['total_points'] + 1)
+    print(f"{len(df)} rows, {len(df.columns)} columns")
+
+    conn, cursor = connect_to_cloud_db()
+    if conn is None:
+        raise SystemExit("Could not connect to the database, check the ORACLE_* environment variables")
+
+    try:
+        for strategy in args.strategies.split(','):
+            table_name = f"bench_{strategy}"
+            cursor.execute(create_table_query(df, table_name))
+            try:
+                for phase, frame in (('insert', df), ('update', updated)):
+                    start = time.perf_counter()
+                    counts = run(strategy, table_name, frame, cursor, args.batch_size)
+                    conn.commit()
+                    seconds = time.perf_counter() - start
+                    print(f"{strategy:>8} {phase:>6}: {seconds:8.2f}s  {len(frame) / seconds:10.0f} rows/s  {counts}")
+            finally:
+                drop_staging_table(table_name, cursor)
+                cursor.execute(f"DROP TABLE {table_name}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
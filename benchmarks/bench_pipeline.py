@@ -0,0 +1,201 @@
+"""
+End-to-end extract, transform and load benchmark on the stub server and an embedded database
+
+The payloads come from the local stub server, synthetic or recorded
+(--payload-dir, a record_payloads or landing/<date> directory). The load
+runs into a scratch SQLite database through the storage backend and every
+statement sent is counted. For each stage the benchmark reports wall time,
+API requests, database round trips, rows/s and peak traced memory, and
+saves the results as JSON. --compare prints the change from an earlier
+result file.
+
+The stages run as Prefect subflows, like in main_flow. Without
+PREFECT_API_URL, Prefect starts a temporary server before the first stage.
+
+Usage:
+    python -m benchmarks.bench_pipeline --players 700
+    python -m benchmarks.bench_pipeline --scale 10 --output benchmarks/results/10x.json
+    python -m benchmarks.bench_pipeline --payload-dir landing/2024-10-05
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline_700p_abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+from prefect import flow
+
+import base_scrapper
+import fpl_etl
+import operations
+import storage
+from metrics import ROUND_TRIP_CALLS, CountingCursor, RunMetrics
+from benchmarks.bench_fetch import point_scrapper_at
+from benchmarks.stub_server import StubFPLServer
+
+# players of a real season, --scale multiplies it
+BASE_ROSTER = 700
+
+
+class CountingSQLiteBackend(storage.SQLiteBackend):
+    """SQLite backend whose cursors count their round trips into self.metrics"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.metrics = RunMetrics()
+
+    def connect(self):
+        connection, cursor = super().connect()
+        return connection, CountingCursor(cursor, metrics=self.metrics)
+
+    def calls(self):
+        """Round trips so far per cursor call"""
+        return {name: int(self.metrics.counter('db_round_trips_total', call=name)) for name in ROUND_TRIP_CALLS}
+
+
+def frame_rows(data):
+    return sum(len(df) for df in data.values() if isinstance(df, pd.DataFrame))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(stage, function, server, backend, trace, rows_of):
+    """Run one stage and collect its metrics"""
+    requests_before = server.requests
+    calls_before = backend.calls()
+    if trace:
+        tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+
+    calls = {name: count - calls_before[name] for name, count in backend.calls().items()}
+    rows = rows_of(result)
+    metrics = {
+        'seconds': round(seconds, 4),
+        'rows': rows,
+        'rows_per_second': round(rows / seconds) if seconds else None,
+        'requests': server.requests - requests_before,
+        'db_round_trips': sum(calls.values()),
+        'db_calls': calls,
+        'peak_memory_mb': round(tracemalloc.get_traced_memory()[1] / 1e6, 1) if trace else None,
+    }
+    print(f"{stage:>9}: {metrics['seconds']:8.3f}s {rows:9d} rows {metrics['rows_per_second'] or 0:10d} rows/s "
+          f"{metrics['requests']:6d} requests {metrics['db_round_trips']:7d} db round trips"
+          + (f" {metrics['peak_memory_mb']:8.1f} MB peak" if trace else ''))
+    return result, metrics
+
+
+@flow(name="bench_pipeline")
+def pipeline(server, backend, trace):
+    """extract_flow, transform_flow, load_flow into an empty database, then the same load again"""
+    stages = {}
+
+    def extract():
+        return fpl_etl.extract_flow(operations.get_player_ids(), 'all')
+
+    raw_data, stages['extract'] = measure('extract', extract, server, backend, trace, frame_rows)
+    data, stages['transform'] = measure('transform', lambda: fpl_etl.transform_flow(raw_data),
+                                        server, backend, trace, frame_rows)
+
+    def load(create_mode):
+        return lambda: fpl_etl.load_flow(data, create_mode, 'all')
+
+    def loaded_rows(reports):
+        return sum(report['rows'] + report['skipped'] for report in reports.values())
+
+    _, stages['load'] = measure('load', load('auto'), server, backend, trace, loaded_rows)
+    # a daily run: nothing changed, the fingerprinted tables are skipped
+    _, stages['reload'] = measure('reload', load('skip'), server, backend, trace, loaded_rows)
+
+    return stages
+
+
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nchange from {previous_path} (commit {previous.get('commit')}):")
+    for stage, metrics in results['stages'].items():
+        before = previous.get('stages', {}).get(stage)
+        if not before:
+            continue
+        ratio = metrics['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+        print(f"{stage:>9}: {ratio:6.2f}x time, {metrics['db_round_trips'] - before['db_round_trips']:+d} "
+              f"db round trips, {metrics['requests'] - before['requests']:+d} requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=None, help=f'roster size, default {BASE_ROSTER} x scale')
+    parser.add_argument('--scale', type=float, default=1.0, help='synthetic roster scale factor')
+    parser.add_argument('--payload-dir', default=None, help='recorded payloads to serve instead of synthetic ones')
+    parser.add_argument('--latency', type=float, default=0.0, help='stub server delay per response in seconds')
+    parser.add_argument('--concurrency', type=int, default=operations.FETCH_CONCURRENCY)
+    parser.add_argument('--rps', type=float, default=0, help='rate limit, 0 disables it')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc, it slows the stages down')
+    parser.add_argument('--output', default=None, help='result file, default benchmarks/results/pipeline_<players>p_<commit>.json')
+    parser.add_argument('--compare', default=None, help='earlier result file to compare with')
+    args = parser.parse_args()
+
+    players = args.players or round(BASE_ROSTER * args.scale)
+    trace = not args.no_memory
+
+    # every request goes to the stub, nothing is cached or landed
+    base_scrapper.http_cache.mode = 'off'
+    base_scrapper.landing_zone = None
+    base_scrapper.bootstrap_snapshot.invalidate()
+    operations.FETCH_CONCURRENCY = args.concurrency
+    operations.FETCH_RPS = args.rps or None
+
+    with tempfile.TemporaryDirectory() as scratch, \
+            StubFPLServer(players=players, latency=args.latency, payload_dir=args.payload_dir) as server:
+        point_scrapper_at(server.url)
+        backend = CountingSQLiteBackend(os.path.join(scratch, 'bench.sqlite'))
+        storage.backend = backend
+
+        if trace:
+            tracemalloc.start()
+        try:
+            stages = pipeline(server, backend, trace)
+        finally:
+            if trace:
+                tracemalloc.stop()
+
+    commit = git_commit()
+    results = {
+        'benchmark': 'pipeline',
+        'commit': commit,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'parameters': {'players': players, 'payload_dir': args.payload_dir, 'latency': args.latency,
+                       'concurrency': args.concurrency, 'rps': args.rps or None, 'memory_traced': trace},
+        'stages': stages,
+        'total_seconds': round(sum(stage['seconds'] for stage in stages.values()), 4),
+    }
+
+    output = args.output or os.path.join('benchmarks', 'results', f"pipeline_{players}p_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nresults saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+StatsStore indexed lookups against re-reading and filtering the exported csv files
+
+Usage:
+    python -m benchmarks.bench_stats_store --players 700 --seasons 10 --gameweeks 38 --lookups 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from stats_store import StatsStore
+
+TEAMS = [f'Team {team}' for team in range(1, 21)]
+POSITIONS = ['GKP', 'DEF', 'MID', 'FWD']
+
+
+def write_exports(data_dir, players, seasons, gameweeks, seed=0):
+    """csv files shaped like the player season and current season exports"""
+    rng = random.Random(seed)
+    roster = [(f'P{player}', player, 100000 + player, rng.choice(TEAMS), rng.randint(1, 4))
+              for player in range(1, players + 1)]
+    season_names = [f'{year}-{(year + 1) % 100:02d}' for year in range(2024 - seasons, 2024)]
+
+    for season in season_names:
+        directory = os.path.join(data_dir, 'players', season)
+        os.makedirs(directory)
+        pd.DataFrame([(web_name, player_id, pos_id, season, code, rng.randint(0, 250), rng.randint(0, 3420),
+                       team, POSITIONS[pos_id - 1])
+                      for web_name, player_id, code, team, pos_id in roster],
+                     columns=['WEB_NAME', 'PLAYER_ID', 'POS_ID', 'SEASON_NAME', 'ELEMENT_CODE',
+                              'TOTAL_POINTS', 'MINUTES', 'CURRENT_TEAM', 'POSITION_NAME']
+                     ).to_csv(os.path.join(directory, f'players_{season}_stats.csv'), index=False)
+
+    pd.DataFrame([(web_name, POSITIONS[pos_id - 1], f'Gameweek {gameweek}', rng.choice(TEAMS),
+                   rng.randint(-2, 20), rng.randint(0, 90), player_id, code, team, gameweek)
+                  for gameweek in range(1, gameweeks + 1)
+                  for web_name, player_id, code, team, pos_id in roster],
+                 columns=['WEB_NAME', 'POSITION_NAME', 'GAMEWEEK', 'OPPONENT', 'TOTAL_POINTS', 'MINUTES',
+                          'PLAYER_ID', 'ELEMENT_CODE', 'TEAM', 'GAMEWEEK_ID']
+                 ).to_csv(os.path.join(data_dir, 'current_season_stats.csv'), index=False)
+    return roster, season_names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--players', type=int, default=700)
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--gameweeks', type=int, default=38)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--scan-lookups', type=int, default=50, help='lookups timed on the re-read path')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as data_dir:
+        roster, season_names = write_exports(data_dir, args.players, args.seasons, args.gameweeks)
+        current_path = os.path.join(data_dir, 'current_season_stats.csv')
+        season_paths = [os.path.join(data_dir, 'players', season, f'players_{season}_stats.csv')
+                        for season in season_names]
+
+        queries = []
+        for _ in range(args.lookups):
+            first = rng.randint(1, args.gameweeks)
+            queries.append((rng.choice(roster)[0], rng.choice(TEAMS), first, min(args.gameweeks, first + 5)))
+
+        def scan(web_name, team, first, last):
+            seasons = pd.concat([pd.read_csv(path) for path in season_paths], ignore_index=True)
+            current = pd.read_csv(current_path)
+            return (seasons[seasons['WEB_NAME'] == web_name],
+                    current[(current['TEAM'] == team) & current['GAMEWEEK_ID'].between(first, last)])
+
+        start = time.perf_counter()
+        for query in queries[:args.scan_lookups]:
+            scan(*query)
+        scan_seconds = (time.perf_counter() - start) / args.scan_lookups
+
+        start = time.perf_counter()
+        store = StatsStore(data_dir, formats=('csv',))
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for web_name, team, first, last in queries:
+            store.seasons(web_name=web_name)
+            store.gameweeks(team=team, first=first, last=last)
+        lookup_seconds = (time.perf_counter() - start) / len(queries)
+
+        # the indexed results match the scans
+        for query in queries[:args.scan_lookups]:
+            web_name, team, first, last = query
+            seasons, current = scan(*query)
+            assert len(store.seasons(web_name=web_name)) == len(seasons)
+            assert len(store.gameweeks(team=team, first=first, last=last)) == len(current)
+
+        print(f"rows: {len(store._seasons)} player seasons, {len(store._gameweeks)} current season")
+        print(f"re-read and filter: {scan_seconds * 1000:8.2f} ms per lookup pair")
+        print(f"store load:         {load_seconds * 1000:8.2f} ms once")
+        print(f"store lookup:       {lookup_seconds * 1000:8.3f} ms per lookup pair "
+              f"({scan_seconds / lookup_seconds:.0f}x)")
+        print(f"{args.lookups} lookup pairs: re-read {scan_seconds * args.lookups:.1f}s, "
+              f"store {load_seconds + lookup_seconds * args.lookups:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
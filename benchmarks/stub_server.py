@@ -0,0 +1,284 @@
+"""
+Local stand-in for the FPL API used by the benchmarks and the tests
+
+Serves bootstrap-static/ and element-summary/<id>/ from recorded payloads
+(a directory written by record_payloads, or a landing/<date> directory of
+the pipeline) or from a synthetic roster, with
+configurable latency and a fraction of 429 (or 5xx) responses to exercise
+the retry path of the scrapper. Responses carry an ETag and conditional requests
+get a 304, to exercise the http cache.
+"""
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# deadline of the first gameweek, later gameweeks follow weekly
+SEASON_START = date(2024, 8, 16)
+
+
+def synthetic_bootstrap(players=700, teams=20, gameweeks=38, finished=8):
+    """Build a bootstrap-static payload with the keys operations.py reads"""
+    events = []
+    for gw in range(1, gameweeks + 1):
+        done = gw <= finished
+        events.append({
+            'id': gw, 'name': f'Gameweek {gw}', 'deadline_time': f'{SEASON_START + timedelta(weeks=gw - 1):%Y-%m-%d}T17:30:00Z',
+            'deadline_time_epoch': 1723829400 + gw * 604800, 'average_entry_score': 50 if done else 0,
+            'finished': done, 'data_checked': done, 'highest_score': 120 if done else None,
+            'ranked_count': 1000 if done else 0,
+            'chip_plays': [{'chip_name': 'bboost', 'num_played': 1000 + gw}, {'chip_name': '3xc', 'num_played': 500 + gw}] if done else [],
+            'most_selected': 1 if done else None, 'most_transferred_in': 2 if done else None,
+            'top_element': 3 if done else None, 'top_element_info': {'id': 3, 'points': 20} if done else None,
+            'transfers_made': 100000 if done else 0, 'most_captained': 1 if done else None,
+            'most_vice_captained': 2 if done else None,
+        })
+
+    elements = []
+    for pid in range(1, players + 1):
+        elements.append({
+            'id': pid, 'first_name': f'First{pid}', 'second_name': f'Second{pid}', 'web_name': f'Player{pid}',
+            'code': 100000 + pid, 'element_type': 1 + pid % 4, 'event_points': pid % 13, 'total_points': pid % 97,
+            'minutes': (pid * 37) % 900, 'selected_by_percent': f'{pid % 50 / 10:.1f}', 'form': f'{pid % 9:.1f}',
+            'photo': f'{100000 + pid}.jpg', 'points_per_game': f'{pid % 7:.1f}', 'status': 'a',
+            'team': 1 + pid % teams, 'team_code': 1 + pid % teams, 'region': 241,
+            'goals_scored': pid % 5, 'goals_conceded': pid % 11, 'assists': pid % 3, 'clean_sheets': pid % 4,
+            'own_goals': 0, 'penalties_saved': 0, 'penalties_missed': 0, 'yellow_cards': pid % 2,
+            'red_cards': 0, 'saves': 0, 'bonus': pid % 6, 'bps': pid % 150, 'influence': f'{pid % 300:.1f}',
+            'creativity': f'{pid % 200:.1f}', 'threat': f'{pid % 100:.1f}', 'ict_index': f'{pid % 60:.1f}',
+            'starts': pid % 9, 'expected_goals': f'{pid % 5 / 3:.2f}', 'expected_assists': f'{pid % 4 / 3:.2f}',
+            'expected_goal_involvements': f'{pid % 9 / 3:.2f}', 'expected_goals_conceded': f'{pid % 12 / 3:.2f}',
+        })
+
+    team_rows = []
+    for tid in range(1, teams + 1):
+        team_rows.append({
+            'id': tid, 'code': tid, 'name': f'Team {tid}', 'short_name': f'T{tid:02d}', 'win': 0, 'draw': 0,
+            'loss': 0, 'played': 0, 'points': 0, 'position': tid, 'strength': 3,
+            'strength_overall_home': 1100, 'strength_overall_away': 1100, 'strength_attack_home': 1100,
+            'strength_attack_away': 1100, 'strength_defence_home': 1100, 'strength_defence_away': 1100,
+        })
+
+    positions = [{'id': i + 1, 'plural_name': plural, 'singular_name': plural[:-1], 'singular_name_short': short,
+                  'element_count': players // 4}
+                 for i, (plural, short) in enumerate([('Goalkeepers', 'GKP'), ('Defenders', 'DEF'),
+                                                     ('Midfielders', 'MID'), ('Forwards', 'FWD')])]
+
+    return {'events': events, 'elements': elements, 'teams': team_rows, 'element_types': positions}
+
+
+def synthetic_summary(player_id, teams=20, gameweeks=38, finished=8, seasons=5):
+    """Build an element-summary payload for one player"""
+    team = 1 + player_id % teams
+    fixtures = []
+    history = []
+    for gw in range(1, gameweeks + 1):
+        opponent = 1 + (team + gw) % teams
+        is_home = gw % 2 == 0
+        fixture_id = gw * 100 + min(team, opponent)
+        kickoff = f'{SEASON_START + timedelta(weeks=gw - 1, days=1):%Y-%m-%d}T14:00:00Z'
+        if gw <= finished:
+            history.append({
+                'element': player_id, 'fixture': fixture_id, 'opponent_team': opponent,
+                'total_points': (player_id + gw) % 12, 'was_home': is_home, 'kickoff_time': kickoff,
+                'team_h_score': gw % 4, 'team_a_score': gw % 3, 'round': gw, 'minutes': (player_id * gw) % 91,
+                'goals_scored': 0, 'assists': 0, 'clean_sheets': gw % 2, 'goals_conceded': gw % 3,
+                'own_goals': 0, 'penalties_saved': 0, 'penalties_missed': 0, 'yellow_cards': 0,
+                'red_cards': 0, 'saves': 0, 'bonus': 0, 'bps': (player_id + gw) % 40,
+                'influence': f'{(player_id + gw) % 50:.1f}', 'creativity': f'{gw % 30:.1f}',
+                'threat': f'{player_id % 20:.1f}', 'ict_index': f'{gw % 10:.1f}', 'starts': 1,
+                'expected_goals': f'{gw % 3 / 10:.2f}', 'expected_assists': '0.00',
+                'expected_goal_involvements': f'{gw % 3 / 10:.2f}', 'expected_goals_conceded': '1.00',
+                'value': 50 + player_id % 60, 'transfers_balance': gw * 10 - 100, 'selected': 1000 * player_id,
+                'transfers_in': gw * 10, 'transfers_out': 100,
+            })
+        else:
+            fixtures.append({
+                'id': fixture_id, 'code': 2444000 + fixture_id, 'team_h': team if is_home else opponent,
+                'team_h_score': None, 'team_a': opponent if is_home else team, 'team_a_score': None,
+                'event': gw, 'finished': False, 'minutes': 0, 'provisional_start_time': False,
+                'kickoff_time': kickoff, 'event_name': f'Gameweek {gw}', 'is_home': is_home,
+                'difficulty': 1 + (team + gw) % 5,
+            })
+
+    history_past = [{
+        'season_name': f'{2018 + s}/{19 + s}', 'element_code': 100000 + player_id, 'start_cost': 50,
+        'end_cost': 52, 'total_points': 100 + s, 'minutes': 2000, 'goals_scored': s, 'assists': s,
+        'clean_sheets': 5, 'goals_conceded': 30, 'own_goals': 0, 'penalties_saved': 0,
+        'penalties_missed': 0, 'yellow_cards': 2, 'red_cards': 0, 'saves': 0, 'bonus': 10, 'bps': 400,
+        'influence': '400.0', 'creativity': '300.0', 'threat': '200.0', 'ict_index': '90.0', 'starts': 25,
+        'expected_goals': '3.10', 'expected_assists': '2.20', 'expected_goal_involvements': '5.30',
+        'expected_goals_conceded': '30.00',
+    } for s in range(seasons)]
+
+    return {'fixtures': fixtures, 'history': history, 'history_past': history_past}
+
+
+def record_payloads(directory, api_url='https://fantasy.premierleague.com/api', players=None):
+    """
+    Save the live bootstrap-static and element-summary payloads for replay
+    by StubFPLServer(payload_dir=directory)
+
+    Args:
+        directory: output directory
+        api_url: API root to record from
+        players: number of players to record, None for all of them
+    """
+    import requests
+
+    os.makedirs(os.path.join(directory, 'element-summary'), exist_ok=True)
+    with requests.Session() as session:
+        response = session.get(f'{api_url}/bootstrap-static/', timeout=30)
+        response.raise_for_status()
+        with open(os.path.join(directory, 'bootstrap-static.json'), 'wb') as f:
+            f.write(response.content)
+
+        player_ids = [element['id'] for element in response.json()['elements']][:players]
+        for player_id in player_ids:
+            response = session.get(f'{api_url}/element-summary/{player_id}/', timeout=30)
+            response.raise_for_status()
+            with open(os.path.join(directory, 'element-summary', f'{player_id}.json'), 'wb') as f:
+                f.write(response.content)
+            time.sleep(0.05)  # stay well within the API rate limit
+    return len(player_ids)
+
+
+class StubFPLServer:
+    """
+    Threaded HTTP server answering like the FPL API
+
+    Args:
+        players: roster size of the synthetic payloads
+        latency: seconds each response is delayed, simulates the round trip
+        error_rate: fraction of element-summary requests answered with error_status
+        payload_dir: directory of recorded payloads, overrides the synthetic ones
+        error_status: status of the error responses, 429 or a 5xx
+        fail_first: the first requests of every element-summary url answered
+                    with error_status, to exercise the retries deterministically
+    """
+
+    def __init__(self, players=700, latency=0.0, error_rate=0.0, payload_dir=None, seed=0,
+                 error_status=429, fail_first=0):
+        self.players = players
+        self.latency = latency
+        self.error_rate = error_rate
+        self.payload_dir = payload_dir
+        self.error_status = error_status
+        self.fail_first = fail_first
+        self.requests = 0
+        self._attempts = {}
+        self.not_modified = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/api'
+
+    def _payload(self, path):
+        if path in self._cache:
+            return self._cache[path]
+
+        parts = [part for part in path.split('/') if part]
+        body = None
+        if self.payload_dir:
+            name = 'bootstrap-static.json' if parts[-1] == 'bootstrap-static' else f'element-summary/{parts[-1]}.json'
+            file_path = os.path.join(self.payload_dir, name)
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as f:
+                    body = f.read()
+            elif os.path.exists(f'{file_path}.gz'):  # landing zone layout
+                with gzip.open(f'{file_path}.gz', 'rb') as f:
+                    body = f.read()
+        elif parts[-1] == 'bootstrap-static':
+            body = json.dumps(synthetic_bootstrap(self.players)).encode()
+        elif len(parts) >= 2 and parts[-2] == 'element-summary' and parts[-1].isdigit():
+            player_id = int(parts[-1])
+            if player_id <= self.players:
+                body = json.dumps(synthetic_summary(player_id)).encode()
+
+        self._cache[path] = body
+        return body
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    throttle = False
+                    if 'element-summary' in self.path:
+                        attempt = stub._attempts.get(self.path, 0)
+                        stub._attempts[self.path] = attempt + 1
+                        throttle = attempt < stub.fail_first or stub._random.random() < stub.error_rate
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if throttle:
+                    self.send_response(stub.error_status)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                body = stub._payload(self.path.split('?')[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = f'"{zlib.crc32(body):08x}"'
+                if self.headers.get('If-None-Match') == etag:
+                    with stub._lock:
+                        stub.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,6 +1,7 @@
 import oracledb
 from tqdm import tqdm
 import pandas as pd
+from schemas import oracle_type
 
 """
 The create_table_query function dynamically creates the sql 
@@ -9,6 +10,44 @@ table statements query
 The create_table function creates the tables in db 
 """
 
+# natural keys of the tables loaded by key rather than by first column
+# a fixture appears once from each side, so is_home is part of its key
+TABLE_KEYS = {
+    'fixtures': ['id', 'is_home'],
+    'history': ['element', 'fixture'],
+    'history_past': ['element_code', 'season_name'],
+    'chip_plays': ['gameweek_id', 'chip_name']
+}
+
+# secondary indexes of the joins and filters of the export queries in generate_files.py,
+# index name and columns per table. The joins on a column leading a primary key
+# (history.element, history_past.element_code, players.player_id) use the key's index
+TABLE_INDEXES = {
+    'gameweeks': {
+        'gameweeks_name_ix': ['name'],                 # where gws.name in (...)
+    },
+    'players': {
+        'players_code_ix': ['player_code'],            # players.player_code = history_past.element_code
+        'players_team_ix': ['team_id'],                # teams.team_id = players.team_id
+    },
+    'history': {
+        'history_round_ix': ['round'],                 # gameweeks.gameweek_id = history.round
+        'history_opponent_ix': ['opponent_team'],      # teams.team_id = history.opponent_team
+    },
+    'history_past': {
+        'history_past_season_ix': ['season_name'],     # where season_name = :season
+    },
+}
+
+def table_keys(table_name, df):
+    """
+    Key columns of a table, the first column unless listed in TABLE_KEYS
+
+    Args:
+        table name, dataframe
+    """
+    return TABLE_KEYS.get(table_name, [df.columns[0]])
+
 # SQL CREATE TABLE statement from DataFrame function
 def create_table_query(df, table_name):
 
@@ -18,25 +57,13 @@ def create_table_query(df, table_name):
     Args:
         tabale name, dataframe
     """
-    primary_key = df.columns[0] # set first column as the PK
+    primary_key = ', '.join(table_keys(table_name, df)) # first column unless the table has a natural key
 
     sql = f"CREATE TABLE {table_name} ("
     
-    # Loop over DataFrame columns and infer SQL data types
+    # Loop over DataFrame columns, declared types first then inferred from the dtype
     for col in df.columns:
-        dtype = df[col].dtype
-        
-        # Map pandas data types to Oracle SQL data types
-        if pd.api.types.is_integer_dtype(dtype):
-            sql += f"{col} NUMBER, "
-        elif pd.api.types.is_float_dtype(dtype):
-            sql += f"{col} FLOAT, "
-        elif pd.api.types.is_bool_dtype(dtype):
-            sql += f"{col} VARCHAR2(10), "
-        elif pd.api.types.is_datetime64_any_dtype(dtype):
-            sql += f"{col} DATE, "
-        else:
-            sql += f"{col} VARCHAR2(255), "
+        sql += f"{col} {oracle_type(table_name, col, df[col].dtype)}, "
 
     # add PK constraint  
     sql += f"PRIMARY KEY ({primary_key}), "
@@ -76,64 +103,81 @@ def create_table(table_dict, cursor):
                 print(f"Table {table_name} already exists.")
                 print(f"Error creating table: {e}")
 
-def create_non_pk_query(df, table_name):
 
+def table_indexes(table_name):
     """
-    Function to create sql create table query
+    Secondary indexes declared for a table in TABLE_INDEXES
 
-    Args:
-        tabale name, dataframe
+    Returns:
+        dictionary of index name and its columns
     """
-    primary_key = df.columns[0] # set first column as the PK
+    return TABLE_INDEXES.get(table_name, {})
 
-    sql = f"CREATE TABLE {table_name} ("
-    
-    # Loop over DataFrame columns and infer SQL data types
-    for col in df.columns:
-        dtype = df[col].dtype
-        
-        # Map pandas data types to Oracle SQL data types
-        if pd.api.types.is_integer_dtype(dtype):
-            sql += f"{col} NUMBER, "
-        elif pd.api.types.is_float_dtype(dtype):
-            sql += f"{col} FLOAT, "
-        elif pd.api.types.is_bool_dtype(dtype):
-            sql += f"{col} VARCHAR2(10), "
-        elif pd.api.types.is_datetime64_any_dtype(dtype):
-            sql += f"{col} DATE, "
-        else:
-            sql += f"{col} VARCHAR2(255), "
+def create_index_query(table_name, index_name, columns):
+    return f"CREATE INDEX {index_name} ON {table_name} ({', '.join(columns)})"
 
-    # necessary to remove the last comma and space, and close the SQL statement
-    sql = sql.rstrip(", ") + ")"
-    
-    return sql
+def missing_indexes(table_name, existing):
+    """
+    Function to find the declared indexes a table does not have
+
+    An existing index whose leading columns are the declared columns,
+    whatever its name, serves the same lookups.
 
-def create_non_pk_table(table_dict, cursor):
+    Args:
+        table name
+        existing: column lists of the table's indexes, in index column order
+    Returns:
+        dictionary of index name and columns of the missing indexes
     """
-    Function to create database tables
+    existing = [[col.lower() for col in columns] for columns in existing]
+    return {index_name: columns for index_name, columns in table_indexes(table_name).items()
+            if not any(index[:len(columns)] == columns for index in existing)}
+
+def ensure_table_indexes(table_name, existing, cursor):
+    """
+    Function to create the declared indexes a table is missing
 
     Args:
-        dictionary of tables and their data
+        table name
+        existing: column lists of the table's indexes, see missing_indexes
         cursor
+    Returns:
+        names of the indexes created
     """
-    print("\nStarting tasks to create non PK tables in Oracle db ...")
-    print("=" * 50)
-    for table_name, df in tqdm(table_dict.items(), desc="Creating tables"):
-            
-            cursor.execute(f"SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = UPPER(:1)", [table_name])
-            table_exists = cursor.fetchone()[0] > 0
+    created = []
+    for index_name, columns in missing_indexes(table_name, existing).items():
+        cursor.execute(create_index_query(table_name, index_name, columns))
+        created.append(index_name)
+    return created
 
-            if table_exists:
-                print(f"Table {table_name} already exists. Skipping creation.")
-                continue
+def ensure_table_key(table_name, df, cursor):
+    """
+    Function to add the key to a table created before it had one
 
-            create_table_sql = create_non_pk_query(df, table_name)
+    Duplicate copies left by earlier append-only loads are removed first,
+    keeping one row per key, then the primary key constraint is added.
 
-            # Execute the SQL statement to create the table
-            try:
-                cursor.execute(create_table_sql)
-                print(f"Table {table_name} created successfully.")
-            except oracledb.DatabaseError as e:
-                print(f"Table {table_name} already exists.")
-                print(f"Error creating table: {e}")
\ No newline at end of file
+    Args:
+        table name, dataframe, cursor
+
+    Returns:
+        number of duplicate rows removed, None if the table already had a key
+    """
+    cursor.execute("""SELECT COUNT(*) FROM USER_CONSTRAINTS
+                      WHERE TABLE_NAME = UPPER(:1) AND CONSTRAINT_TYPE = 'P'""", [table_name])
+    if cursor.fetchone()[0] > 0:
+        return None
+
+    keys = table_keys(table_name, df)
+    null_keys = ' OR '.join([f"{col} IS NULL" for col in keys])
+
+    cursor.execute(f"""
+        DELETE FROM {table_name}
+        WHERE {null_keys}
+           OR ROWID NOT IN (SELECT MAX(ROWID) FROM {table_name} GROUP BY {', '.join(keys)})
+    """)
+    removed = cursor.rowcount
+
+    cursor.execute(f"ALTER TABLE {table_name} ADD CONSTRAINT {table_name}_pk PRIMARY KEY ({', '.join(keys)})")
+
+    return removed
@@ -1,5 +1,6 @@
 import oracledb
 import os
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -13,24 +14,111 @@ cs = os.getenv("ORACLE_DSN")
 dir = os.getenv("lib_dir")
 
 
+# session pool settings
+pool_min = int(os.getenv("ORACLE_POOL_MIN", "1"))
+pool_max = int(os.getenv("ORACLE_POOL_MAX", "8"))
+pool_increment = int(os.getenv("ORACLE_POOL_INCREMENT", "1"))
+stmt_cache_size = int(os.getenv("ORACLE_STMT_CACHE_SIZE", "50"))
+# milliseconds a session request waits on a fully used pool before it fails
+pool_wait_timeout = int(os.getenv("ORACLE_POOL_WAIT_TIMEOUT", "60000"))
+
+# datetimes bound into the VARCHAR2 columns of tables created before the
+# typed schemas keep the format those columns were loaded with
+SESSION_DATE_FORMAT = 'YYYY-MM-DD HH:MI AM'
+
+_client_initialized = False
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_client():
+        """
+        Initialise the Oracle client once per process
+        Thick mode is used when the instant client is available, thin mode otherwise
+        """
+        global _client_initialized
+        if _client_initialized:
+            return
+
+        try:
+            oracledb.init_oracle_client(lib_dir=dir)
+        except Exception:
+                # If already initialized or thick mode not available, continue
+            pass
+        _client_initialized = True
+
+
+def init_session(connection, requested_tag):
+        """
+        Session callback of the pool, runs once per new pooled session
+        """
+        cursor = connection.cursor()
+        cursor.execute(f"ALTER SESSION SET NLS_DATE_FORMAT = '{SESSION_DATE_FORMAT}' "
+                       f"NLS_TIMESTAMP_FORMAT = '{SESSION_DATE_FORMAT}'")
+        cursor.close()
+
+
+def get_pool(min_sessions=None, max_sessions=None, increment=None, stmtcachesize=None):
+        """
+        Return the process wide session pool, creating it on first use
+
+        The TLS handshake and wallet setup of Oracle Cloud are paid once per
+        pooled session instead of once per connection. When every session is
+        in use a request waits up to ORACLE_POOL_WAIT_TIMEOUT and then fails
+        instead of waiting forever.
+
+        Args:
+            min_sessions, max_sessions, increment: pool sizing, default to ORACLE_POOL_* variables
+            stmtcachesize: statements cached per session
+
+        Returns:
+            oracledb.ConnectionPool
+        """
+        global _pool
+        with _pool_lock:
+            if _pool is None:
+                init_client()
+
+                if not all([username, password]):
+                        raise ValueError("Database credentials are not fully set in the environment variables.")
+
+                _pool = oracledb.create_pool(user=username, password=password, dsn=cs,
+                                             min=pool_min if min_sessions is None else min_sessions,
+                                             max=pool_max if max_sessions is None else max_sessions,
+                                             increment=pool_increment if increment is None else increment,
+                                             stmtcachesize=stmt_cache_size if stmtcachesize is None else stmtcachesize,
+                                             getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                                             wait_timeout=pool_wait_timeout,
+                                             session_callback=init_session)
+                print(f"Created Oracle session pool at {datetime.now()}")
+            return _pool
+
+
+def close_pool():
+        """
+        Close the session pool, eg. at the end of a script
+        """
+        global _pool
+        with _pool_lock:
+            if _pool is not None:
+                _pool.close(force=True)
+                _pool = None
+
+
 """
 Pointing databse connection to Oracle Cloud
 For local connection, use commented code below this
 """
 # connect to Oracle Cloud db
 def connect_to_cloud_db():
-        try:
+        """
+        Borrow a session from the pool, closing the connection returns it to the pool
 
-            try:
-                oracledb.init_oracle_client(lib_dir=dir)
-            except Exception:
-                    # If already initialized or thick mode not available, continue
-                pass
-            
-            if not all([username, password]):
-                    raise ValueError("Database credentials are not fully set in the environment variables.")    
-            connection = oracledb.connect(user=username, password=password,
-                                          dsn=cs)
+        Returns:
+            tuple: connection, cursor
+        """
+        try:
+            connection = get_pool().acquire()
                 # Create a cursor
             cursor = connection.cursor()
             print(f"Successfully connected to Oracle Database at {datetime.now()}")
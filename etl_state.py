@@ -0,0 +1,191 @@
+import pandas as pd
+import storage
+
+"""
+Small tables holding the pipeline state between runs
+eg. the last gameweek fully loaded by an incremental run
+and the fingerprint of every row loaded into the PK tables
+
+The statements use named binds and no MERGE so they run on every
+storage backend
+"""
+
+STATE_TABLE = 'etl_state'
+
+# last gameweek that was finished and data checked when history was loaded
+HISTORY_WATERMARK = 'history_watermark'
+# season whose history_past rows have been loaded
+HISTORY_PAST_SEASON = 'history_past_season'
+# fingerprints of the players whose element-summary an incremental run fetched,
+# kept in the fingerprint table under this name
+PLAYER_SNAPSHOT = 'player_snapshot'
+PLAYER_SNAPSHOT_COLUMNS = ['player_id', 'event_points', 'minutes_played']
+
+# row fingerprints keyed by table and primary key
+HASH_TABLE = 'etl_row_hashes'
+
+
+def ensure_state_table(cursor):
+    """
+    Function to create the state table if it does not exist
+
+    Args:
+        cursor
+    """
+    if not storage.backend.table_exists(cursor, STATE_TABLE):
+        cursor.execute(f"""
+            CREATE TABLE {STATE_TABLE} (
+                name VARCHAR2(100),
+                value VARCHAR2(255),
+                updated_at TIMESTAMP,
+                PRIMARY KEY (name)
+            )
+        """)
+
+
+def get_state(cursor, name, default=None):
+    """
+    Function to read one state value
+
+    Args:
+        cursor, state name, value returned when it is not set
+
+    Returns:
+        the stored string value or default
+    """
+    cursor.execute(f"SELECT value FROM {STATE_TABLE} WHERE name = :name", {'name': name})
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def set_state(cursor, name, value):
+    """
+    Function to store one state value, part of the caller's transaction
+
+    Args:
+        cursor, state name, value
+    """
+    binds = {'name': name, 'value': str(value)}
+    cursor.execute(f"""
+        UPDATE {STATE_TABLE} SET value = :value, updated_at = CURRENT_TIMESTAMP
+        WHERE name = :name
+    """, binds)
+    if cursor.rowcount == 0:
+        cursor.execute(f"""
+            INSERT INTO {STATE_TABLE} (name, value, updated_at)
+            VALUES (:name, :value, CURRENT_TIMESTAMP)
+        """, binds)
+
+
+def save_state(cursor, etl_state):
+    """
+    Function to store the state of an incremental run, part of the caller's transaction
+
+    Args:
+        cursor, dict of state name -> value, a series of row hashes
+        is stored in the fingerprint table under its name
+    """
+    for name, value in etl_state.items():
+        if isinstance(value, pd.Series):
+            save_row_hashes(cursor, name, value)
+        else:
+            set_state(cursor, name, value)
+
+
+def ensure_hash_table(cursor):
+    """
+    Function to create the row fingerprint table if it does not exist
+
+    Args:
+        cursor
+    """
+    if not storage.backend.table_exists(cursor, HASH_TABLE):
+        cursor.execute(f"""
+            CREATE TABLE {HASH_TABLE} (
+                table_name VARCHAR2(128),
+                row_key VARCHAR2(255),
+                row_hash VARCHAR2(16),
+                PRIMARY KEY (table_name, row_key)
+            )
+        """)
+
+
+def row_fingerprints(df, key_columns):
+    """
+    Function to hash every row of a dataframe
+
+    Args:
+        dataframe, key columns
+
+    Returns:
+        pandas series of 16 hex digit row hashes indexed by the row key
+    """
+    keys = df[key_columns].astype(str).agg('|'.join, axis=1)
+    hashes = pd.util.hash_pandas_object(df, index=False).map('{:016x}'.format)
+
+    return pd.Series(hashes.to_numpy(), index=keys.to_numpy())
+
+
+def load_row_hashes(cursor, table_name):
+    """
+    Function to read the stored fingerprints of a table
+
+    Returns:
+        dict of row key -> row hash
+    """
+    cursor.execute(f"SELECT row_key, row_hash FROM {HASH_TABLE} WHERE table_name = :table_name",
+                   {'table_name': table_name})
+    return dict(cursor.fetchall())
+
+
+def changed_rows(df, key_columns, stored):
+    """
+    Function to compare a dataframe with the stored fingerprints
+
+    Args:
+        dataframe, key columns, stored fingerprints from load_row_hashes
+
+    Returns:
+        tuple of (rows to load, their fingerprints, counts of new / changed / skipped rows)
+    """
+    fingerprints = row_fingerprints(df, key_columns)
+    previous = fingerprints.index.map(stored)
+
+    is_new = previous.isna()
+    is_changed = ~is_new & (previous != fingerprints.to_numpy())
+    to_load = is_new | is_changed
+
+    counts = {'new': int(is_new.sum()), 'changed': int(is_changed.sum()),
+              'skipped': int((~to_load).sum())}
+
+    return df[to_load], fingerprints[to_load], counts
+
+
+def save_row_hashes(cursor, table_name, fingerprints):
+    """
+    Function to store fingerprints of loaded rows, part of the caller's transaction
+
+    Args:
+        cursor, table name, series of row hashes indexed by row key
+    """
+    if fingerprints.empty:
+        return
+
+    # replace the stored fingerprints of these keys
+    rows = [{'table_name': table_name, 'row_key': key, 'row_hash': row_hash}
+            for key, row_hash in fingerprints.items()]
+    cursor.executemany(f"DELETE FROM {HASH_TABLE} WHERE table_name = :table_name AND row_key = :row_key",
+                       [{'table_name': row['table_name'], 'row_key': row['row_key']} for row in rows])
+    cursor.executemany(f"INSERT INTO {HASH_TABLE} (table_name, row_key, row_hash) "
+                       f"VALUES (:table_name, :row_key, :row_hash)", rows)
+
+
+def clear_row_hashes(cursor, table_name):
+    """
+    Function to forget the fingerprints of a table, eg. after it is recreated
+
+    Args:
+        cursor, table name
+    """
+    if storage.backend.table_exists(cursor, HASH_TABLE):
+        cursor.execute(f"DELETE FROM {HASH_TABLE} WHERE table_name = :table_name", {'table_name': table_name})
@@ -1,13 +1,21 @@
 from prefect import task, flow, get_run_logger
-from typing import Dict, List, Any
+from prefect.artifacts import create_table_artifact
+from prefect.task_runners import ThreadPoolTaskRunner
+from typing import Dict, List, Any, Optional
 import logging
+import os
 import sys 
 from datetime import datetime
-from contextlib import contextmanager
+from contextlib import contextmanager, ExitStack
 from insert_update import *
 from create_database_table import *
 from operations import *
-from dbconn import connect_to_cloud_db
+import base_scrapper
+import storage
+from etl_state import *
+from landing import LandingZone, parse_source, prune_landings
+from transform import transform_tables
+from metrics import run_metrics, CountingCursor, METRICS_TEXTFILE
 
 # Set up basic logging configuration
 logging.basicConfig(
@@ -30,9 +38,7 @@ def table_exists(table_name: str, cursor: Any) -> bool:
     logger = get_run_logger()
     
     try:
-        cursor.execute(f"SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = UPPER(:1)", [table_name])
-        
-        exists = cursor.fetchone()[0]
+        exists = storage.backend.table_exists(cursor, table_name)
         logger.info(f"Checked existence of table {table_name}: {'exists' if exists else 'does not exist'}")
         return exists
     except Exception as e:
@@ -48,22 +54,24 @@ def check_tables_exist(tables_data: Dict[str, Any], cursor: Any) -> Dict[str, bo
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connection with logging"""
+    """Context manager borrowing a pooled database session with logging"""
     logger = get_run_logger()
     logger.info("Initiating database connection")
     try:
-        conn, cursor = connect_to_cloud_db()
-        logger.info("Database connection established successfully")
+        conn, cursor = storage.backend.connect()
+        # round trips made on the session are counted into the run metrics
+        cursor = CountingCursor(cursor)
+        logger.info(f"Database session acquired from the {storage.backend.name} backend")
         yield conn, cursor
     except Exception as e:
         logger.error(f"Database connection failed: {str(e)}")
         raise
     finally:
-        logger.info("Closing database connection")
+        logger.info("Releasing database session")
         try:
             cursor.close()
-            conn.close()
-            logger.info("Database connection closed successfully")
+            conn.close() # returns the session to the pool
+            logger.info("Database session released to the pool")
         except Exception as e:
             logger.error(f"Error while closing database connection: {str(e)}")
 
@@ -83,21 +91,54 @@ def retrieve_player_id() -> List[int]:
         logger.error(f"Failed to retrieve player IDs: {str(e)}")
         raise
 
+# task reading what earlier runs loaded, used by incremental extraction
+@task(retries=2)
+def read_load_state() -> Dict[str, Any]:
+    """Task to read the incremental watermarks and the snapshot of the players fetched so far"""
+    logger = get_run_logger()
+    with get_db_connection() as (conn, cursor):
+        ensure_state_table(cursor)
+        ensure_hash_table(cursor)
+        load_state = {
+            'watermark': int(get_state(cursor, HISTORY_WATERMARK, 0)),
+            'history_past_season': get_state(cursor, HISTORY_PAST_SEASON),
+            'player_snapshot': load_row_hashes(cursor, PLAYER_SNAPSHOT)
+        }
+        conn.commit()
+
+    logger.info(f"Loaded state: watermark gameweek {load_state['watermark']}, "
+                f"history_past season {load_state['history_past_season']}, "
+                f"{len(load_state['player_snapshot'])} players in the snapshot")
+    return load_state
+
 # flow for data extraction for first task
 @flow(name="extract_data")
-def extract_flow(player_ids: List[int], mode: str = 'all') -> Dict[str, Any]:
+def extract_flow(player_ids: List[int], mode: str = 'all',
+                 load_state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Sub-flow handling all data extraction from API"""
     logger = get_run_logger()
     logger.info("Starting data extraction flow")
+
+    if mode == 'incremental':
+        return record_extracted(extract_incremental(player_ids, load_state or {}))
     
+    # fixtures, history and history_past come from the same element-summary
+    # response, so every player is fetched once and the result is shared
+    summaries = {}
+
+    def player_summaries(name):
+        if not summaries:
+            summaries.update(get_player_summaries(player_ids))
+        return summaries[name]
+
     data_points = {
         'gameweeks': get_gameweeks,
         'players': get_player_stat,
         'teams': get_team_stat,
         'positions': get_positions,
-        'fixtures': lambda: get_fixtures(player_ids),
-        'history': lambda: get_history(player_ids),
-        'history_past': lambda: get_history_past(player_ids)
+        'fixtures': lambda: player_summaries('fixtures'),
+        'history': lambda: player_summaries('history'),
+        'history_past': lambda: player_summaries('history_past')
     }
     
     extracted_data = {}
@@ -118,18 +159,108 @@ def extract_flow(player_ids: List[int], mode: str = 'all') -> Dict[str, Any]:
             raise
 
     logger.info("Completed data extraction flow")
+    return record_extracted(extracted_data)
+
+def record_extracted(extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the rows extracted per table to the run metrics, returns the data unchanged"""
+    for name, data in extracted_data.items():
+        if isinstance(data, pd.DataFrame):
+            run_metrics.record_extract(name, len(data))
+    return extracted_data
+
+def extract_incremental(player_ids: List[int], load_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Incremental extraction keyed on finished gameweeks
+
+    History rows for rounds after the watermark (the last finished and data
+    checked gameweek) are kept. When a gameweek was checked since the last
+    run every player is fetched, so players whose stats did not move (eg. 0
+    points and 0 minutes again) get their row of the new round and rows
+    loaded while the gameweek was live get their final values. Inside a
+    gameweek only players whose event_points or minutes changed since their
+    element-summary was last fetched are fetched. history_past is refreshed
+    for every player once per season. The new watermark and the snapshot of
+    the players fetched are returned under 'etl_state' and saved by
+    load_flow with the data.
+
+    A player whose fetch failed keeps the snapshot of its last successful
+    fetch, so the next run fetches it again, and the watermark only
+    advances when every fetch succeeded.
+    """
+    logger = get_run_logger()
+
+    extracted_data = {}
+    for name, getter in {'gameweeks': get_gameweeks, 'players': get_player_stat,
+                         'teams': get_team_stat, 'positions': get_positions}.items():
+        logger.info(f"Extracting {name} data")
+        extracted_data[name] = getter()
+
+    watermark = int(load_state.get('watermark') or 0)
+    checked = last_checked_gameweek()
+    season = current_season()
+    refresh_past = load_state.get('history_past_season') != season
+    snapshot = load_state.get('player_snapshot') or {}
+
+    changed, fingerprints, _ = changed_rows(extracted_data['players'][PLAYER_SNAPSHOT_COLUMNS],
+                                            ['player_id'], snapshot)
+    if refresh_past:
+        fetch_ids = player_ids
+        logger.info(f"Refreshing history_past for season {season}, fetching all {len(fetch_ids)} players")
+    elif checked > watermark:
+        fetch_ids = player_ids
+        logger.info(f"Gameweeks {watermark + 1} to {checked} were checked since the last load, "
+                    f"fetching all {len(fetch_ids)} players")
+    else:
+        fetch_ids = changed['player_id'].to_list() if snapshot else player_ids
+        logger.info(f"Fetching {len(fetch_ids)} of {len(player_ids)} players changed since their last fetch")
+
+    summaries = get_player_summaries(fetch_ids) if fetch_ids else {}
+    failed = summaries.get('failed', [])
+
+    history = summaries.get('history')
+    if history is not None and not history.empty:
+        history = history[history['round'] > watermark]
+        if not history.empty:
+            extracted_data['history'] = history.reset_index(drop=True)
+
+    fixtures = summaries.get('fixtures')
+    if fixtures is not None and not fixtures.empty:
+        extracted_data['fixtures'] = fixtures
+
+    history_past = summaries.get('history_past')
+    if refresh_past and history_past is not None and not history_past.empty:
+        extracted_data['history_past'] = history_past
+
+    # only the players fetched successfully move to their new snapshot
+    fetched = fingerprints[~fingerprints.index.isin([str(player_id) for player_id in failed])]
+    extracted_data['etl_state'] = {PLAYER_SNAPSHOT: fetched}
+    if failed:
+        logger.warning(f"{len(failed)} player fetches failed, keeping the watermark at gameweek {watermark}")
+    else:
+        extracted_data['etl_state'][HISTORY_WATERMARK] = checked
+        if refresh_past:
+            extracted_data['etl_state'][HISTORY_PAST_SEASON] = season
+
+    for name in ('history', 'fixtures', 'history_past'):
+        rows = len(extracted_data[name]) if name in extracted_data else 0
+        logger.info(f"Extracted {rows} {name} rows")
+
+    logger.info("Completed incremental data extraction flow")
     return extracted_data
 
-# flow for data transform. Just passing the raw data for now
+# flow for data transform, nested fields to JSON and chip plays to their own table
 @flow(name="transform_data")
 def transform_flow(raw_data: Dict[str, Any]) -> Dict[str, Any]:
     """Sub-flow for any data transformations needed"""
     logger = get_run_logger()
     logger.info("Starting data transformation flow")
     try:
-        # add transformation here later
-        logger.info("Completed data transformation flow")
-        return raw_data
+        start = datetime.now()
+        transformed_data = transform_tables(raw_data)
+        if 'chip_plays' in transformed_data:
+            logger.info(f"Split {len(transformed_data['chip_plays'])} chip plays from gameweeks")
+        logger.info(f"Completed data transformation flow in {(datetime.now() - start).total_seconds():.3f}s")
+        return transformed_data
     except Exception as e:
         logger.error(f"Error in transform flow: {str(e)}")
         raise
@@ -143,6 +274,9 @@ def create_tables(tables_data: Dict[str, Any],
                  create_mode: str = 'auto') -> None:
     """
     Task to create database tables based on different modes
+
+    Whatever the mode, every table that exists afterwards is checked for the
+    secondary indexes of TABLE_INDEXES and the missing ones are created.
     
     Args:
         tables_data: Dictionary containing table data
@@ -152,7 +286,7 @@ def create_tables(tables_data: Dict[str, Any],
     logger = get_run_logger()
     logger.info(f"Table creation started with mode: {create_mode}")
     
-    pk_keys = {'gameweeks', 'players', 'teams', 'positions'}
+    pk_keys = {'gameweeks', 'chip_plays', 'players', 'teams', 'positions'}
     pk_data = {k: tables_data[k] for k in pk_keys if k in tables_data}
 
     non_pk_keys = {'fixtures', 'history', 'history_past'}
@@ -163,41 +297,51 @@ def create_tables(tables_data: Dict[str, Any],
 
     if create_mode == 'skip':
         logger.info("Skipping table creation as mode is 'skip'")
-        return
     
     elif create_mode == 'force':
         logger.info("Force creating all tables")
         for table_name in pk_data.keys():
             if existing_pk_tables[table_name]:
                 logger.info(f"Dropping existing table: {table_name}")
-                cursor.execute(f"DROP TABLE {table_name}")
-                sql = create_table_query(tables_data[table_name], table_name)
-                cursor.execute(sql)
+                storage.backend.drop_table(cursor, table_name)
+                clear_row_hashes(cursor, table_name)
+                storage.backend.create_table(cursor, table_name, tables_data[table_name])
 
         for table_name in non_pk_data.keys():
             if existing_non_pk_tables[table_name]:
                 logger.info(f"Dropping existing table: {table_name}")
-                cursor.execute(f"DROP TABLE {table_name}")
-                sql = create_non_pk_query(tables_data[table_name], table_name)
-                cursor.execute(sql)
+                storage.backend.drop_table(cursor, table_name)
+                clear_row_hashes(cursor, table_name)
+                storage.backend.create_table(cursor, table_name, tables_data[table_name])
 
     elif create_mode == 'auto':
         logger.info("Auto-creating missing tables")
         for table_name, exists in existing_pk_tables.items():
             if not exists:
                 logger.info(f"Creating missing table: {table_name}")
-                sql = create_table_query(tables_data[table_name], table_name)
-                cursor.execute(sql)
+                storage.backend.create_table(cursor, table_name, tables_data[table_name])
+                clear_row_hashes(cursor, table_name)
             else:
                 logger.info(f"Skipping existing table: {table_name}")
 
         for table_name, exists in existing_non_pk_tables.items():
             if not exists:
                 logger.info(f"Creating missing table: {table_name}")
-                sql = create_non_pk_query(tables_data[table_name], table_name)
-                cursor.execute(sql)
+                storage.backend.create_table(cursor, table_name, tables_data[table_name])
             else:
-                logger.info(f"Skipping existing table: {table_name}")   
+                logger.info(f"Skipping existing table: {table_name}")
+                # tables created before they had a natural key get it added once
+                removed = storage.backend.ensure_table_key(cursor, table_name, tables_data[table_name])
+                if removed is not None:
+                    logger.info(f"Added natural key to {table_name}, removed {removed} duplicate rows")   
+
+    # auto created the missing tables, the other modes leave them missing
+    existing_tables = {**existing_pk_tables, **existing_non_pk_tables}
+    for table_name, exists in existing_tables.items():
+        if exists or create_mode == 'auto':
+            created = storage.backend.ensure_indexes(cursor, table_name)
+            if created:
+                logger.info(f"Created indexes on {table_name}: {', '.join(created)}")
             
 # flow for table creation
 # @flow(name="create_table")
@@ -224,71 +368,263 @@ def create_tables(tables_data: Dict[str, Any],
 
 '''******************************************************'''
 
-# task to load data into tables
-@task(retries=2)
-def load_tables(tables_data: Dict[str, Any], cursor: Any, mode: str = 'all') -> None:
-    """Task to load data into tables"""
+'''
+load strategies per table:
+    row: one statement per row
+    batch: array-bound chunks of batch_size rows (default)
+    staging: array load into a temporary staging table, then one set-based MERGE
+'''
+LOAD_STRATEGIES = {'fixtures': 'staging', 'history': 'staging', 'history_past': 'staging'}
+
+# tables whose rows are fingerprinted so unchanged rows are not sent again
+FINGERPRINT_TABLES = {'gameweeks', 'chip_plays', 'players', 'teams', 'positions'}
+
+# tables loaded at the same time by load_flow, each on its own pooled session
+LOAD_MAX_PARALLEL = int(os.getenv("FPL_LOAD_MAX_PARALLEL", "4"))
+
+def load_table(table_name: str, data: Any, cursor: Any,
+               strategy: str = 'batch',
+               batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+               delete_missing: bool = False) -> Dict[str, int]:
+    """Upsert one table on its key (see TABLE_KEYS) with the chosen strategy"""
+    return storage.backend.upsert(cursor, table_name, data, table_keys(table_name, data),
+                                  strategy, batch_size, delete_missing)
+
+def tables_to_load(tables_data: Dict[str, Any], mode: str = 'all') -> Dict[str, Any]:
+    """Tables loaded in this mode, the non-PK tables only when mode is 'all'"""
+    pk_keys = ['gameweeks', 'chip_plays', 'players', 'teams', 'positions']
+    non_pk_keys = ['fixtures', 'history', 'history_past']
+
+    keys = pk_keys + (non_pk_keys if mode == 'all' else [])
+    return {k: tables_data[k] for k in keys if k in tables_data}
+
+def prepare_load(tables: Dict[str, Any], cursor: Any, strategies: Dict[str, str],
+                 skip_unchanged: bool = True, with_state: bool = False) -> None:
+    """
+    Create the helper tables a load needs before any rows are loaded,
+    their DDL commits implicitly so it runs on the DDL session
+    """
+    if skip_unchanged or with_state:
+        ensure_hash_table(cursor)
+    if with_state:
+        ensure_state_table(cursor)
+    for table_name, data in tables.items():
+        storage.backend.prepare_upsert(cursor, table_name, data, strategies.get(table_name, 'batch'))
+
+def load_one_table(table_name: str, data: Any, cursor: Any,
+                   strategy: str = 'batch',
+                   batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+                   delete_missing: bool = False,
+                   skip_unchanged: bool = True) -> Dict[str, Any]:
+    """
+    Load one table on the given cursor, skipping unchanged fingerprinted rows
+
+    The counts come from the DML itself (array DML row counts, MERGE
+    tallies and batch errors), the table is never counted.
+
+    Returns:
+        load report: table, strategy, rows sent, unchanged rows skipped,
+        inserts, updates, deletes, errors, database round trips, seconds
+        and rows sent per second
+    """
     logger = get_run_logger()
+    logger.info(f"Starting data load for table: {table_name}")
+    start = datetime.now()
+    round_trips = getattr(cursor, 'round_trips', 0)
+    skipped = 0
+
+    # a partial load would make delete_missing drop the unchanged rows
+    fingerprinted = skip_unchanged and table_name in FINGERPRINT_TABLES and not delete_missing
+    if fingerprinted:
+        data, fingerprints, diff = changed_rows(data, table_keys(table_name, data),
+                                                load_row_hashes(cursor, table_name))
+        skipped = diff['skipped']
+        logger.info(f"{table_name}: {diff['new']} new, {diff['changed']} changed, "
+                    f"{diff['skipped']} unchanged rows skipped")
+
+    counts = load_table(table_name, data, cursor, strategy,
+                        batch_size, delete_missing) # calling module for loading
+
+    # rejected rows keep their old fingerprint out of the store so they are retried
+    if fingerprinted and not counts['errors']:
+        save_row_hashes(cursor, table_name, fingerprints)
+
+    report = {
+        'table': table_name,
+        'strategy': strategy,
+        'rows': len(data),
+        'skipped': skipped,
+        'inserts': counts['inserts'],
+        'updates': counts['updates'],
+        'deletes': counts.get('deletes', 0),
+        'errors': counts['errors'],
+        'round_trips': getattr(cursor, 'round_trips', 0) - round_trips,
+        'seconds': round((datetime.now() - start).total_seconds(), 3)
+    }
+    report['rows_per_second'] = round(report['rows'] / report['seconds']) if report['seconds'] else None
+    run_metrics.record_load(report)
 
-    pk_keys = {'gameweeks', 'players', 'teams', 'positions'}
-    pk_data = {k: tables_data[k] for k in pk_keys if k in tables_data}
+    logger.info(f"Loaded {table_name} using {strategy} load: {report['inserts']} inserted, "
+                f"{report['updates']} updated in {report['seconds']}s, {report['round_trips']} round trips")
+    if report['deletes']:
+        logger.info(f"Deleted {report['deletes']} rows no longer present from {table_name}")
+    if report['errors']:
+        logger.warning(f"{report['errors']} rows rejected while loading {table_name}")
 
-    non_pk_keys = {'fixtures', 'history', 'history_past'}
-    non_pk_data = {k: tables_data[k] for k in non_pk_keys if k in tables_data}
+    return report
 
-    for table_name, data in pk_data.items():
-        try:
-            logger.info(f"Starting data load for table: {table_name}")
-            rows_before = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-            
-            upsert_insert_data(table_name, data, cursor) # calling module for loading
-            
-            rows_after = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-            rows_added = rows_after - rows_before
-            
-            logger.info(f"Loaded {rows_added} new rows into {table_name}")
-        except Exception as e:
-            logger.error(f"Failed to load data for table {table_name}: {str(e)}")
-            raise
-    if mode == 'all':
-        for table_name, data in non_pk_data.items():
+# task to load one table, tables are loaded concurrently by load_flow
+@task(retries=2)
+def load_table_task(table_name: str, data: Any, cursor: Any = None,
+                    strategy: str = 'batch',
+                    batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+                    delete_missing: bool = False,
+                    skip_unchanged: bool = True) -> Dict[str, Any]:
+    """
+    Task to load data into one table, returns its load report
+
+    Args:
+        cursor: session owned by the flow, which commits it with the other tables.
+                None loads and commits on a pooled session of the task's own
+    """
+    logger = get_run_logger()
+    try:
+        if cursor is not None:
+            return load_one_table(table_name, data, cursor, strategy, batch_size,
+                                  delete_missing, skip_unchanged)
+
+        with get_db_connection() as (conn, own_cursor):
             try:
-                logger.info(f"Starting data load for table: {table_name}")
-                rows_before = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-                
-                insert_non_pk_data(table_name, data, cursor) # calling module for loading
-                
-                rows_after = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-                rows_added = rows_after - rows_before
-                
-                logger.info(f"Loaded {rows_added} new rows into {table_name}")
-            except Exception as e:
-                logger.error(f"Failed to load data for table {table_name}: {str(e)}")
+                counts = load_one_table(table_name, data, own_cursor, strategy, batch_size,
+                                        delete_missing, skip_unchanged)
+                conn.commit()
+                return counts
+            except Exception:
+                conn.rollback()
                 raise
-    else:
-        logger.info("Skipping non-primary key table data load as mode is not 'all'")
+    except Exception as e:
+        logger.error(f"Failed to load data for table {table_name}: {str(e)}")
+        raise
 
 # flow for data loading
 @flow(name="create_table_load_data")
 def load_flow(transformed_data: Dict[str, Any],
               create_mode: str = 'auto', 
-              load_mode: str = 'all') -> None:
-    """Sub-flow handling database operations"""
+              load_mode: str = 'all',
+              batch_size: Optional[int] = DEFAULT_BATCH_SIZE,
+              load_strategies: Optional[Dict[str, str]] = None,
+              delete_missing: Optional[List[str]] = None,
+              skip_unchanged: bool = True,
+              max_parallel: int = LOAD_MAX_PARALLEL,
+              all_or_nothing: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Sub-flow handling database operations
+
+    Tables have no foreign keys between them, so each one is loaded by its
+    own task on its own pooled session, up to max_parallel at a time.
+
+    Args:
+        load_strategies: load strategy per table, defaults to LOAD_STRATEGIES
+        delete_missing: staged tables whose rows missing from the new data are deleted
+        skip_unchanged: only send new or changed rows of the FINGERPRINT_TABLES
+        max_parallel: tables loaded at the same time
+        all_or_nothing: commit the tables only once every table loaded,
+                        otherwise each table commits as soon as it is done.
+                        Every table holds its own session until then, so the
+                        pool must have a session per table. The final commits
+                        run one table after another and are not atomic, a
+                        failed commit leaves the tables committed before it.
+
+    Returns:
+        load report of every loaded table keyed by table name, see load_one_table
+    """
     logger = get_run_logger()
     logger.info("Starting data load flow")
-    
-    with get_db_connection() as (conn, cursor):
+
+    strategies = {**LOAD_STRATEGIES, **(load_strategies or {})}
+    delete_missing = set(delete_missing or [])
+    etl_state = transformed_data.get('etl_state')
+    tables = tables_to_load(transformed_data, load_mode)
+    if load_mode != 'all':
+        logger.info("Skipping non-primary key table data load as mode is not 'all'")
+
+    # all or nothing holds a session per table, a smaller pool could never hand them all out
+    if all_or_nothing and not storage.backend.single_writer and len(tables) > storage.backend.max_sessions():
+        raise ValueError(f"all_or_nothing holds a session per table, {len(tables)} tables need more "
+                         f"than the {storage.backend.max_sessions()} sessions of the pool, "
+                         f"raise ORACLE_POOL_MAX or load with all_or_nothing=False")
+
+    # DDL runs on its own pooled session, it commits implicitly in Oracle
+    with get_db_connection() as (ddl_conn, ddl_cursor):
+        create_tables(transformed_data, ddl_cursor, create_mode)
+        prepare_load(tables, ddl_cursor, strategies, skip_unchanged, bool(etl_state))
+        ddl_conn.commit()
+
+    # an embedded backend has a single writer, its tables load one at a time on one session
+    if storage.backend.single_writer:
+        max_parallel = 1
+
+    logger.info(f"Loading {len(tables)} tables with max_parallel={max_parallel}, all_or_nothing={all_or_nothing}")
+
+    with ExitStack() as sessions:
+        # all or nothing: the flow holds one open transaction per table until every table is loaded
+        connections = {}
+        if all_or_nothing and storage.backend.single_writer:
+            shared = sessions.enter_context(get_db_connection())
+            connections = {table_name: shared for table_name in tables}
+        elif all_or_nothing:
+            for table_name in tables:
+                connections[table_name] = sessions.enter_context(get_db_connection())
+
+        with ThreadPoolTaskRunner(max_workers=max(1, max_parallel)) as runner:
+            futures = {
+                table_name: runner.submit(load_table_task, parameters={
+                    'table_name': table_name,
+                    'data': data,
+                    'cursor': connections[table_name][1] if all_or_nothing else None,
+                    'strategy': strategies.get(table_name, 'batch'),
+                    'batch_size': batch_size,
+                    'delete_missing': table_name in delete_missing,
+                    'skip_unchanged': skip_unchanged
+                })
+                for table_name, data in tables.items()
+            }
+            for future in futures.values():
+                future.wait()
+
+        failed = [table_name for table_name, future in futures.items() if future.state.is_failed()]
+        reports = {table_name: future.result() for table_name, future in futures.items()
+                   if table_name not in failed}
+
         try:
-            logger.info("Beginning database transaction")
-            create_tables(transformed_data, cursor, create_mode)
-            load_tables(transformed_data, cursor, load_mode)
-            
-            conn.commit()
-            logger.info("Successfully committed database transaction")
-            
+            if failed:
+                raise RuntimeError(f"Failed to load tables: {', '.join(failed)}")
+
+            # watermarks of an incremental run are saved with the data
+            if etl_state:
+                state_conn, state_cursor = (next(iter(connections.values())) if connections
+                                            else sessions.enter_context(get_db_connection()))
+                save_state(state_cursor, etl_state)
+                for name, value in etl_state.items():
+                    logger.info(f"Saved {name} = " + (f"{len(value)} rows" if isinstance(value, pd.Series) else f"{value}"))
+                if not connections:
+                    state_conn.commit()
+
+            for conn, cursor in connections.values():
+                conn.commit()
+            if all_or_nothing:
+                logger.info("Successfully committed all loaded tables")
+
+            for report in reports.values():
+                logger.info(f"{report['table']}: {report['rows']} rows sent, {report['skipped']} skipped, "
+                            f"{report['inserts']} inserted, {report['updates']} updated, "
+                            f"{report['deletes']} deleted, {report['errors']} rejected")
+            return reports
+
         except Exception as e:
             logger.error(f"Error in load flow, rolling back transaction: {str(e)}")
-            conn.rollback()
+            for conn, cursor in connections.values():
+                conn.rollback()
             raise
         finally:
             logger.info("Completed data load flow")
@@ -303,6 +639,18 @@ def handle_flow_failure(flow_name: str, error: str) -> None:
     logger.error(f"Flow {flow_name} failed with error: {error}")
     # will add some kind of notification here
 
+# task publishing the metrics of the run
+@task
+def publish_metrics(success: bool, textfile: Optional[str] = None) -> None:
+    """Task to publish the run metrics as a table artifact, and as a Prometheus textfile when a path is given"""
+    logger = get_run_logger()
+    create_table_artifact(key="fpl-etl-run-metrics", table=run_metrics.table_rows(),
+                          description=run_metrics.summary())
+    logger.info("Published the run metrics artifact")
+    if textfile:
+        run_metrics.write_textfile(textfile, success)
+        logger.info(f"Wrote Prometheus metrics to {textfile}")
+
 '''******************************************************'''
 
 """
@@ -311,11 +659,37 @@ create_mode:
     force: drop all tables and recreate
     skip: skip table creation
 extract_mode:
-    all: extract data for all tables
+    all: extract data for all tables, fixtures played since the last load
+         are deleted from FIXTURES
+    incremental: only players changed since the last load and gameweeks after the
+                 saved watermark, history_past once per season (loads all tables)
     if not all: extract data for (players, gameweeks, positions, teams)
 load_mode:
     all: load data into all tables
     if not all: load data into only (players, gameweeks, positions, teams)
+bootstrap_ttl:
+    seconds a bootstrap-static payload fetched by an earlier run may be reused,
+    it is kept in FPL_BOOTSTRAP_PATH between flow runs. None falls back to
+    FPL_BOOTSTRAP_TTL and otherwise fetches a fresh copy
+max_parallel:
+    tables loaded at the same time, each on its own database session
+all_or_nothing:
+    True commits the loaded tables only once all of them loaded successfully
+http_cache:
+    on: keep API responses on disk and revalidate them with ETag/Last-Modified
+    offline: replay the whole extract phase from the responses on disk
+    off: plain requests, None falls back to FPL_HTTP_CACHE
+source:
+    api: extract from the FPL API
+    landing:<YYYY-MM-DD>: re-drive transform and load from the raw responses
+                          landed that day without the network, landing:latest
+                          for the newest one
+land_raw:
+    True lands every raw API response of the run in landing/<today>, about
+    one file per player, keeping the newest FPL_LANDING_KEEP days
+metrics_textfile:
+    Prometheus textfile the run metrics are written to, None falls back to
+    FPL_METRICS_TEXTFILE and otherwise only the Prefect artifact is published
 
 No paramater specification in main_flow equals default state (auto, all, all)
 """
@@ -323,23 +697,63 @@ No paramater specification in main_flow equals default state (auto, all, all)
 @flow(name="fpl_etl_pipeline")
 def main_flow(create_mode: str = 'skip', 
               extract_mode: str = 'not all', 
-              load_mode: str = 'not all') -> None:
-    """Main flow orchestrating the entire ETL pipeline"""
+              load_mode: str = 'not all',
+              bootstrap_ttl: Optional[int] = None,
+              max_parallel: int = LOAD_MAX_PARALLEL,
+              all_or_nothing: bool = True,
+              http_cache: Optional[str] = None,
+              source: str = 'api',
+              land_raw: bool = False,
+              metrics_textfile: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Main flow orchestrating the entire ETL pipeline, returns the load report of every table"""
     logger = get_run_logger()
     start_time = datetime.now()
+    run_metrics.reset()
+    success = False
     logger.info(f"Starting FPL ETL pipeline at {start_time} with create_mode: {create_mode}, extract_mode: {extract_mode}, load_mode: {load_mode}")
     # logger.info(f"Starting FPL ETL pipeline at {start_time}")
     
     try:
+        # reuse the bootstrap payload of a previous run only inside the ttl window
+        bootstrap_snapshot.expire(bootstrap_ttl)
+        if http_cache is not None:
+            base_scrapper.http_cache.mode = http_cache
+            logger.info(f"HTTP cache mode: {http_cache}")
+
+        # raw responses are landed on disk, or replayed from an earlier landing
+        zone = parse_source(source)
+        if zone is not None:
+            bootstrap_snapshot.invalidate()
+            logger.info(f"Replaying the extract from {zone.directory}")
+        elif land_raw:
+            zone = LandingZone()
+            # a landing needs the bootstrap-static response too, a reused snapshot has none
+            bootstrap_snapshot.invalidate()
+            logger.info(f"Landing raw API responses in {zone.directory}")
+        base_scrapper.landing_zone = zone
+
         # Extract phase
         logger.info("Starting data extraction phase")
-        player_ids = retrieve_player_id()
-        raw_data = extract_flow(player_ids, extract_mode)
+        with run_metrics.stage('player_ids'):
+            player_ids = retrieve_player_id()
+        load_state = None
+        if extract_mode == 'incremental':
+            with run_metrics.stage('read_state'):
+                load_state = read_load_state()
+            # incremental history rows are only useful if the non-PK tables get loaded
+            load_mode = 'all'
+        with run_metrics.stage('extract'):
+            raw_data = extract_flow(player_ids, extract_mode, load_state)
+        if zone is not None and not zone.replay:
+            removed = prune_landings()
+            if removed:
+                logger.info(f"Removed {len(removed)} old landings: {', '.join(removed)}")
         logger.info("Completed data extraction phase")
         
         # Transform phase
         logger.info("Starting transformation phase")
-        transformed_data = transform_flow(raw_data)
+        with run_metrics.stage('transform'):
+            transformed_data = transform_flow(raw_data)
         logger.info("Completed transformation phase")
 
         # logger.info("Starting table creation phase")
@@ -348,18 +762,33 @@ def main_flow(create_mode: str = 'skip',
 
         # Table Creation and Load phase
         logger.info("Starting table creation and loading phase")
-        load_flow(transformed_data, create_mode, load_mode)
+        # element-summary only lists upcoming fixtures, a full extract drops the played ones
+        delete_missing = ['fixtures'] if extract_mode == 'all' else None
+        with run_metrics.stage('load'):
+            load_report = load_flow(transformed_data, create_mode, load_mode,
+                                    delete_missing=delete_missing,
+                                    max_parallel=max_parallel, all_or_nothing=all_or_nothing)
         logger.info("Completed load phase")
         
         end_time = datetime.now()
         duration = end_time - start_time
         logger.info(f"FPL ETL pipeline completed successfully in {duration}")
+        success = True
+        return load_report
         
     except Exception as e:
         logger.error("FPL ETL pipeline failed")
         handle_flow_failure("main_flow", str(e))
         raise
     finally:
+        base_scrapper.landing_zone = None
+        logger.info("Stage timings: " + ", ".join(f"{stage} {seconds:.1f}s"
+                                                   for stage, seconds in run_metrics.stages.items()))
+        # a failed run publishes its metrics too, they show where it stopped
+        try:
+            publish_metrics(success, metrics_textfile or METRICS_TEXTFILE)
+        except Exception as e:
+            logger.warning(f"Failed to publish the run metrics: {str(e)}")
         logger.info("ETL pipeline process ended")
 
 '''******************************************************'''
@@ -1,17 +1,380 @@
 
 import pandas as pd
 import os
+import json
+import pickle
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
+import storage
+from create_database_table import TABLE_INDEXES, missing_indexes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet export is optional
+    pa = pq = None
 
 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
+# rows fetched per round trip and written per chunk during an export
+EXPORT_ARRAYSIZE = int(os.getenv("FPL_EXPORT_ARRAYSIZE", "1000"))
+
+# file formats written by every export, csv and/or parquet (needs pyarrow)
+EXPORT_FORMATS = [fmt.strip() for fmt in os.getenv("FPL_EXPORT_FORMATS", "csv").split(",") if fmt.strip()]
+PARQUET_COMPRESSION = os.getenv("FPL_PARQUET_COMPRESSION", "zstd")
+
+# content hash and row count of every exported partition, see load_manifest
+MANIFEST_PATH = "data/export_manifest.json"
+
 print("=" * 50)
 print("Generating csv files and saving in specified folders ...")
 print("=" * 50)
 
-def fetch_and_save_season_data(season, cursor):
-    # SQL query to get data for the specified season
-    query = f"""
+
+def column_dtypes(profile):
+    """
+    The dtype pandas would give each column had the whole result been
+    loaded at once, so every chunk can be written the same way
+
+    Args:
+        profile: per column [set of value types, has None, dates only,
+                 fraction of a second digits]
+    Returns:
+        list of 'int64', 'float64', 'date', 'datetime' or 'object'
+    """
+    dtypes = []
+    for types, has_none, dates_only, _ in profile:
+        if types == {int} and not has_none:
+            dtypes.append('int64')
+        elif types and types <= {int, float}:
+            dtypes.append('float64')
+        elif types == {datetime}:
+            dtypes.append('date' if dates_only else 'datetime')
+        else:
+            dtypes.append('object')
+    return dtypes
+
+
+def format_paths(file_path, formats=None):
+    """
+    File written for every export format
+
+    Args:
+        file_path: csv file path, other formats swap the extension
+        formats: list of 'csv' and/or 'parquet', defaults to EXPORT_FORMATS
+    Returns:
+        dictionary of format and file path
+    """
+    base = os.path.splitext(file_path)[0]
+    return {fmt: file_path if fmt == 'csv' else f"{base}.{fmt}" for fmt in formats or EXPORT_FORMATS}
+
+
+class ExportSpool:
+    """
+    Rows of one export, spooled to a temporary file while the column
+    types are profiled, then written chunk by chunk with the dtypes a
+    single DataFrame of all the rows would have had. Memory stays at one
+    chunk and the csv matches DataFrame.to_csv byte for byte.
+
+    Args:
+        columns: column names
+        dtypes: declared export dtype of each column, see
+                storage backend export_dtypes, None where the values decide
+    """
+
+    def __init__(self, columns, dtypes=None):
+        self.columns = columns
+        self.dtypes = dtypes or [None] * len(columns)
+        self.profile = [[set(), False, True, 0] for _ in columns]
+        self.rows = 0
+        self.chunks = 0
+        self.spool = tempfile.TemporaryFile()
+
+    def add(self, rows):
+        for row in rows:
+            for value, column in zip(row, self.profile):
+                if value is None:
+                    column[1] = True
+                    continue
+                column[0].add(type(value))
+                if isinstance(value, datetime) and value.time() != datetime.min.time():
+                    column[2] = False
+                    if value.microsecond:
+                        # like pandas, milliseconds unless a value needs microseconds
+                        column[3] = max(column[3], 6 if value.microsecond % 1000 else 3)
+        pickle.dump(rows, self.spool)
+        self.rows += len(rows)
+        self.chunks += 1
+
+    def frames(self, dates_as_text):
+        """
+        Spooled chunks as DataFrames typed like the full result
+
+        Args:
+            dates_as_text: format date columns the way to_csv would
+        """
+        dtypes = column_dtypes(self.profile)
+        self.spool.seek(0)
+        for _ in range(self.chunks):
+            df = pd.DataFrame(pickle.load(self.spool), columns=self.columns, dtype=object)
+            for col, dtype, (_, _, _, digits) in zip(self.columns, dtypes, self.profile):
+                if dtype in ('date', 'datetime'):
+                    df[col] = pd.to_datetime(df[col])
+                    if dates_as_text and dtype == 'date':
+                        df[col] = df[col].dt.strftime('%Y-%m-%d')
+                    elif dates_as_text:
+                        # every value gets the fraction of a second digits the
+                        # most precise value of the whole result needs, as in pandas
+                        text = df[col].dt.strftime('%Y-%m-%d %H:%M:%S.%f' if digits else '%Y-%m-%d %H:%M:%S')
+                        df[col] = text.str[:-3] if digits == 3 else text
+                elif dtype != 'object':
+                    df[col] = df[col].astype(dtype)
+                else:
+                    df[col] = df[col].map(lambda value: value if value is None else str(value))
+            yield df
+
+    def write_csv(self, file_path):
+        with open(file_path, 'w', newline='') as f:
+            if not self.chunks:
+                pd.DataFrame(columns=self.columns).to_csv(f, index=False)
+            for chunk, df in enumerate(self.frames(dates_as_text=True)):
+                df.to_csv(f, index=False, header=chunk == 0)
+
+    def parquet_dtypes(self):
+        """
+        The declared dtype of each column, else the profiled one with an
+        integer column holding None kept as int64 (nullable in parquet) so
+        it does not turn to float64 in the files where a None shows up
+        """
+        dtypes = []
+        for declared, profiled, (types, _, _, _) in zip(self.dtypes, column_dtypes(self.profile), self.profile):
+            if declared is not None:
+                dtypes.append(declared)
+            elif types == {int}:
+                dtypes.append('int64')
+            else:
+                dtypes.append(profiled)
+        return dtypes
+
+    def write_parquet(self, file_path):
+        """
+        Parquet file with explicit column types, one row group per chunk
+        and column statistics so readers can skip row groups
+        """
+        if pq is None:
+            raise ImportError("pyarrow is required to export parquet files, pip install pyarrow")
+        types = {'int64': pa.int64(), 'float64': pa.float64(),
+                 'date': pa.timestamp('s'), 'datetime': pa.timestamp('s'), 'object': pa.string()}
+        schema = pa.schema([(col, types[dtype]) for col, dtype in zip(self.columns, self.parquet_dtypes())])
+        with pq.ParquetWriter(file_path, schema, compression=PARQUET_COMPRESSION, write_statistics=True) as writer:
+            if not self.chunks:
+                writer.write_table(schema.empty_table())
+            for df in self.frames(dates_as_text=False):
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+
+    def write(self, file_path, formats=None):
+        """
+        Write the spooled rows in every format and release the spool
+
+        Args:
+            file_path: csv file path, other formats swap the extension
+            formats: list of 'csv' and/or 'parquet', defaults to EXPORT_FORMATS
+        Returns:
+            number of rows written
+        """
+        with self.spool:
+            for fmt, path in format_paths(file_path, formats).items():
+                if fmt == 'csv':
+                    self.write_csv(path)
+                elif fmt == 'parquet':
+                    self.write_parquet(path)
+                else:
+                    raise ValueError(f"Unknown export format: {fmt}")
+        return self.rows
+
+
+def stream_to_files(cursor, query, params, file_path, arraysize=EXPORT_ARRAYSIZE, formats=None):
+    """
+    Run a query and write its result to a csv (and/or parquet) file one
+    chunk at a time
+
+    Args:
+        cursor, query, query bind parameters, output csv file path
+        arraysize: rows per fetch and per written chunk
+        formats: list of 'csv' and/or 'parquet', defaults to EXPORT_FORMATS
+    Returns:
+        number of rows written
+    """
+    cursor.arraysize = arraysize
+    if hasattr(cursor, 'prefetchrows'):  # oracledb
+        cursor.prefetchrows = arraysize + 1
+    cursor.execute(query, params)
+
+    columns = [col[0] for col in cursor.description]  # Get column names
+    spool = ExportSpool(columns, storage.backend.export_dtypes(cursor.description))
+    while True:
+        rows = cursor.fetchmany(arraysize)
+        if not rows:
+            break
+        spool.add(rows)
+    return spool.write(file_path, formats)
+
+
+def stream_partitions_to_files(cursor, query, partition_column, partition_field, partitions,
+                               file_path_for, order_by=None, arraysize=EXPORT_ARRAYSIZE, formats=None):
+    """
+    Run a query once for all partitions (seasons, gameweeks) and split the
+    result into one file per partition and format in a single pass
+
+    Args:
+        cursor
+        query: select without a where clause, partition_column must be selectable
+        partition_column: column holding the partition, eg. hp.season_name
+        partition_field: name of that column in the result, eg. SEASON
+        partitions: list of partitions to export eg. seasons
+        file_path_for: function returning the csv file path of a partition
+        order_by: ordering of the rows inside a partition, eg. p.web_name
+        arraysize: rows per fetch
+        formats: list of 'csv' and/or 'parquet', defaults to EXPORT_FORMATS
+    Returns:
+        dictionary of partition and rows written
+    """
+    binds = {f'p{i + 1}': partition for i, partition in enumerate(partitions)}
+    ordering = f"{partition_column}, {order_by}" if order_by else partition_column
+    cursor.arraysize = arraysize
+    if hasattr(cursor, 'prefetchrows'):  # oracledb
+        cursor.prefetchrows = arraysize + 1
+    cursor.execute(f"{query} where {partition_column} in ({', '.join(f':{name}' for name in binds)}) "
+                   f"order by {ordering}", binds)
+
+    columns = [col[0] for col in cursor.description]  # Get column names
+    dtypes = storage.backend.export_dtypes(cursor.description)
+    position = [col.upper() for col in columns].index(partition_field.upper())
+    written = {}
+    partition, spool = None, None
+
+    def flush():
+        if spool is not None:
+            written[partition] = spool.write(file_path_for(partition), formats)
+
+    while True:
+        rows = cursor.fetchmany(arraysize)
+        if not rows:
+            break
+        # rows come ordered by partition, so a partition's rows are contiguous
+        for value, group in groupby(rows, key=itemgetter(position)):
+            if spool is None or value != partition:
+                flush()
+                partition, spool = value, ExportSpool(columns, dtypes)
+            spool.add(list(group))
+    flush()
+
+    # requested partitions without rows still get a header only file
+    for missing in partitions:
+        if missing not in written:
+            written[missing] = ExportSpool(columns, dtypes).write(file_path_for(missing), formats)
+    return written
+
+
+def partition_fingerprints(cursor, query, partition_field):
+    """
+    Row count and content hash of every partition of a query, computed in
+    the database so unchanged partitions can be skipped without fetching them,
+    and the column names so a renamed or added column rewrites every partition
+
+    Args:
+        cursor
+        query: select without a where clause
+        partition_field: name of the partition column in the result, eg. SEASON
+    Returns:
+        dictionary of partition and {'rows': count, 'hash': sum of row hashes, 'columns': names}
+    """
+    cursor.execute(f"select * from ({query}) where 1 = 0")
+    columns = [col[0] for col in cursor.description]
+    row_hash = storage.backend.row_hash_sql([f'q."{col}"' for col in columns])
+    cursor.execute(f"""
+        select q."{partition_field.upper()}", count(*), sum({row_hash})
+        from ({query}) q
+        group by q."{partition_field.upper()}"
+    """)
+    return {partition: {'rows': rows, 'hash': str(row_hash), 'columns': columns}
+            for partition, rows, row_hash in cursor.fetchall()}
+
+
+def load_manifest(path=None):
+    """
+    Export manifest of the previous runs, an empty one if there is none yet
+
+    The manifest maps every export to its partitions and for each partition
+    the row count, content hash and columns of the source rows, and the file
+    written in each format.
+    """
+    path = path or MANIFEST_PATH
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=None):
+    """Write the export manifest, replacing the previous one atomically"""
+    path = path or MANIFEST_PATH
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def export_changed_partitions(cursor, query, partition_column, partition_field, partitions,
+                              file_path_for, manifest, order_by=None):
+    """
+    Export only the partitions whose source rows changed since the run
+    recorded in manifest, and record the new ones in it
+
+    A partition missing the file of one of the EXPORT_FORMATS, eg. parquet
+    turned on after the csv files were written, counts as changed.
+
+    Args:
+        cursor, query, partition_column, partition_field, file_path_for, order_by:
+            as in stream_partitions_to_files
+        partitions: list of partitions, None for every partition in the source
+        manifest: dictionary of partition and its entry, updated in place
+    Returns:
+        list of partitions written
+    """
+    fingerprints = partition_fingerprints(cursor, query, partition_field)
+    if partitions is None:
+        partitions = sorted(fingerprints)
+    empty = {'rows': 0, 'hash': 'None'}
+
+    def written(entry):
+        # entries of older manifests have a single 'file' and no formats
+        files = entry.get('files', {})
+        return all(fmt in files and os.path.exists(files[fmt]) for fmt in EXPORT_FORMATS)
+
+    def unchanged(entry, fingerprint):
+        # entries of older manifests have no columns, they are written once more
+        return {key: entry.get(key) for key in fingerprint} == fingerprint
+
+    changed = [partition for partition in partitions
+               if partition not in manifest
+               or not unchanged(manifest[partition], fingerprints.get(partition, empty))
+               or not written(manifest[partition])]
+    if changed:
+        stream_partitions_to_files(cursor, query, partition_column, partition_field, changed,
+                                   file_path_for, order_by=order_by)
+        for partition in changed:
+            manifest[partition] = dict(fingerprints.get(partition, empty), formats=list(EXPORT_FORMATS),
+                                       files=format_paths(file_path_for(partition)))
+    return changed
+
+
+# SQL query to get season data, filtered by season_name by the callers
+SEASON_STATS_QUERY = """
         select first_name || ' ' || second_name as name,
             team_name team, position_name position,
             hp.season_name season,
@@ -27,53 +390,105 @@ def fetch_and_save_season_data(season, cursor):
     JOIN HISTORY_PAST hp ON p.player_code = hp.element_code
     JOIN TEAMS t ON t.team_id = p.team_id
     JOIN POSITIONS pos ON pos.pos_id = p.pos_id
-    where hp.season_name = :season
-    """
-    
-    cursor.execute(query, [season])
-    
-    columns = [col[0] for col in cursor.description]  # Get column names
-    df = pd.DataFrame(cursor.fetchall(), columns=columns)
-    
+"""
+
+# SQL query to generate players stats for diffferent seasons
+# CURRENT_TEAM and POSITION_NAME come last so the earlier columns keep their place, stats_store indexes them.
+# history_past has no team, CURRENT_TEAM is the player's team now, not the one of that season
+PLAYER_SEASON_QUERY = """
+        select p.WEB_NAME,p.PLAYER_ID,p.POS_ID,p.PHOTO,
+        h.*, t.TEAM_NAME current_team, pos.POSITION_NAME from history_past h
+        join players p
+        on p.PLAYER_CODE = h.ELEMENT_CODE
+        join teams t
+        on t.team_id = p.team_id
+        join positions pos
+        on pos.POS_ID = p.pos_id
+"""
+
+
+def season_stats_path(season):
     # Create the directory if it doesn't exist
     directory = f"data/season/{season}"
     os.makedirs(directory, exist_ok=True)
-    
-    # Save the DataFrame to a CSV file
-    file_path = f"{directory}/season_stats.{timestamp}.csv"
-    df.to_csv(file_path, index=False)
-    print(f"Data for {season} saved to {file_path}")
+    return f"{directory}/season_stats.{timestamp}.csv"
 
 
-def player_season_data(season, cursor):
-    
-    # SQL query to generate players stats for diffferent seasons
-    query = f"""
-        select p.WEB_NAME,p.PLAYER_ID,p.POS_ID,p.PHOTO,
-        h.* from history_past h
-        join players p
-        on p.PLAYER_CODE = h.ELEMENT_CODE
-        where season_name = :season
-    """
-    cursor.execute(query, [season])
-    
-    columns = [col[0] for col in cursor.description]  # Get column names
-    df = pd.DataFrame(cursor.fetchall(), columns=columns)
-    
+def player_season_path(season):
     # Create the directory if it doesn't exist
     directory = f"data/players/{season}"
     os.makedirs(directory, exist_ok=True)
-    
-    # Save the DataFrame to a CSV file
-    file_path = f"{directory}/players_{season}_stats.csv"
-    df.to_csv(file_path, index=False)
+    return f"{directory}/players_{season}_stats.csv"
+
+
+def available_seasons(cursor):
+    """
+    Past seasons present in history_past, oldest first
+
+    Args:
+        cursor
+    Returns:
+        list of season names eg. ['2022-23', '2023-24']
+    """
+    cursor.execute("SELECT DISTINCT season_name FROM history_past ORDER BY season_name")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def fetch_and_save_season_data(season, cursor):
+    # Stream the query result to the export files
+    file_path = season_stats_path(season)
+    stream_to_files(cursor, f"{SEASON_STATS_QUERY} where hp.season_name = :season", {'season': season}, file_path)
     print(f"Data for {season} saved to {file_path}")
 
 
-def player_current_season_data(cursor):
-    
-    # SQL query to generate players stats for diffferent seasons
-    query = f"""
+def player_season_data(season, cursor):
+    # Stream the query result to the export files
+    file_path = player_season_path(season)
+    stream_to_files(cursor, f"{PLAYER_SEASON_QUERY} where season_name = :season", {'season': season}, file_path)
+    print(f"Data for {season} saved to {file_path}")
+
+
+def export_season_data(seasons, cursor, manifest=None):
+    """
+    Season data of all the seasons from one query, one file per season
+
+    Args:
+        seasons: list of past seasons eg. ['2022-23', '2023-24']
+        cursor
+        manifest: manifest entries of this export, when given only the
+                  seasons whose source rows changed are written
+    """
+    if manifest is None:
+        written = stream_partitions_to_files(cursor, SEASON_STATS_QUERY, 'hp.season_name', 'season',
+                                             seasons, season_stats_path)
+    else:
+        written = export_changed_partitions(cursor, SEASON_STATS_QUERY, 'hp.season_name', 'season',
+                                            seasons, season_stats_path, manifest)
+    print(f"Season data for {len(written)} seasons saved to data/season")
+
+
+def export_player_season_data(seasons, cursor, manifest=None):
+    """
+    Players stats of all the seasons from one query, one file per season
+
+    Args:
+        seasons: list of past seasons eg. ['2022-23', '2023-24']
+        cursor
+        manifest: manifest entries of this export, when given only the
+                  seasons whose source rows changed are written
+    """
+    if manifest is None:
+        written = stream_partitions_to_files(cursor, PLAYER_SEASON_QUERY, 'h.season_name', 'season_name',
+                                             seasons, player_season_path)
+    else:
+        written = export_changed_partitions(cursor, PLAYER_SEASON_QUERY, 'h.season_name', 'season_name',
+                                            seasons, player_season_path, manifest)
+    print(f"Players data for {len(written)} seasons saved to data/players")
+
+
+# SQL query to generate players stats for the ongoing season
+# the ids, the player's own team and the gameweek number come last, stats_store indexes them
+CURRENT_SEASON_QUERY = """
         select p.first_name || ' ' || p.second_name as name,p.WEB_NAME,
             pos.POSITION_NAME,p.PHOTO,gws.name gameweek,
             gws.DEADLINE_TIME,
@@ -89,7 +504,9 @@ def player_current_season_data(cursor):
             h.THREAT, h.ICT_INDEX, h.STARTS, h.EXPECTED_GOALS,
             h.EXPECTED_ASSISTS, h.EXPECTED_GOAL_INVOLVEMENTS,
             h.EXPECTED_GOALS_CONCEDED, h.VALUE, h.TRANSFERS_BALANCE,
-            h.SELECTED, h.TRANSFERS_IN, h.TRANSFERS_OUT
+            h.SELECTED, h.TRANSFERS_IN, h.TRANSFERS_OUT,
+            p.PLAYER_ID, p.PLAYER_CODE element_code,
+            pt.TEAM_NAME team, h.ROUND gameweek_id
         from history h
         join players p
             on p.PLAYER_ID = h.ELEMENT
@@ -99,18 +516,112 @@ def player_current_season_data(cursor):
             on pos.POS_ID = p.pos_id
         join teams t
             on t.team_id = h.opponent_team
-        order by p.WEB_NAME, gws.NAME
-    """
-    cursor.execute(query)
-    
-    columns = [col[0] for col in cursor.description]  # Get column names
-    df = pd.DataFrame(cursor.fetchall(), columns=columns)
-    
+        join teams pt
+            on pt.team_id = p.team_id
+"""
+
+
+def gameweek_path(gameweek):
+    # Create the directory if it doesn't exist
+    directory = f"data/current_season"
+    os.makedirs(directory, exist_ok=True)
+    return f"{directory}/{gameweek.lower().replace(' ', '_')}.csv"
+
+
+def player_current_season_data(cursor):
     # Create the directory if it doesn't exist
     directory = f"data"
     os.makedirs(directory, exist_ok=True)
     
-    # Save the DataFrame to a CSV file
+    # Stream the query result to the export files, the csv keeps its player
+    # order and the parquet file is written in gameweek order so its row
+    # group statistics let readers skip gameweeks
     file_path = f"{directory}/current_season_stats.csv"
-    df.to_csv(file_path, index=False)
-    print(f"Current season data saved to {file_path}")
\ No newline at end of file
+    for fmt in EXPORT_FORMATS:
+        ordering = 'h.ROUND, p.WEB_NAME' if fmt == 'parquet' else 'p.WEB_NAME, gws.NAME'
+        stream_to_files(cursor, f"{CURRENT_SEASON_QUERY} order by {ordering}", [], file_path, formats=[fmt])
+    print(f"Current season data saved to {file_path}")
+
+
+def export_current_season_gameweeks(cursor, manifest):
+    """
+    Ongoing season stats as one file per gameweek in data/current_season,
+    only the gameweeks whose source rows changed are rewritten. The combined
+    current_season_stats.csv is refreshed only when a gameweek changed.
+
+    Args:
+        cursor
+        manifest: manifest entries of this export, updated in place
+    """
+    written = export_changed_partitions(cursor, CURRENT_SEASON_QUERY, 'gws.name', 'gameweek',
+                                        None, gameweek_path, manifest, order_by='p.WEB_NAME')
+    print(f"Current season data for {len(written)} changed gameweeks saved to data/current_season")
+    if written:
+        player_current_season_data(cursor)
+
+
+def missing_export_indexes(cursor):
+    """
+    Secondary indexes of the export queries missing from the database
+
+    Without them the joins and season / gameweek filters of the exports
+    scan whole tables, so export time grows with history. create_tables
+    adds them on the next load.
+
+    Args:
+        cursor
+    Returns:
+        dictionary of table and {index name: columns} of its missing indexes
+    """
+    missing = {}
+    for table_name in TABLE_INDEXES:
+        if storage.backend.table_exists(cursor, table_name):
+            table_missing = missing_indexes(table_name, storage.backend.index_columns(cursor, table_name))
+            if table_missing:
+                missing[table_name] = table_missing
+    return missing
+
+
+def export_all(seasons=None, max_workers=3, incremental=True):
+    """
+    Run every export on its own pooled session, up to max_workers at a time.
+    Each past season query runs once for all seasons.
+
+    Args:
+        seasons: list of past seasons eg. ['2022-23', '2023-24'],
+                 None exports every season found in history_past
+        max_workers: exports running in parallel, keep it within the pool size
+        incremental: only write the seasons and gameweeks whose source rows
+                     changed since the run recorded in the export manifest
+    """
+    with storage.connection() as (connection, cursor):
+        for table_name, indexes in missing_export_indexes(cursor).items():
+            for index_name, columns in indexes.items():
+                print(f"Warning: index {index_name} on {table_name} ({', '.join(columns)}) is missing, "
+                      f"the exports scan the whole table")
+        if seasons is None:
+            seasons = available_seasons(cursor)
+
+    if incremental:
+        manifest = load_manifest()
+        previous = json.dumps(manifest, sort_keys=True)
+        for export in ('season', 'players', 'current_season'):
+            manifest.setdefault(export, {})
+        jobs = [partial(export_current_season_gameweeks, manifest=manifest['current_season'])]
+        if seasons:
+            jobs += [partial(export_season_data, seasons, manifest=manifest['season']),
+                     partial(export_player_season_data, seasons, manifest=manifest['players'])]
+    else:
+        jobs = [player_current_season_data]
+        if seasons:
+            jobs += [partial(export_season_data, seasons), partial(export_player_season_data, seasons)]
+
+    def run(export):
+        with storage.connection() as (connection, cursor):
+            export(cursor=cursor)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(run, jobs))
+
+    if incremental and json.dumps(manifest, sort_keys=True) != previous:
+        save_manifest(manifest)
@@ -1,52 +1,87 @@
 
 import oracledb
+import pandas as pd
 from tqdm import tqdm
 from collections import defaultdict
+from schemas import bind_rows
+
+# rows sent per executemany call in batched mode
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _report_batch_errors(table_name, cursor, row_numbers):
+    '''print the rows rejected by the last executemany and return their batch offsets
+
+    row_numbers maps each offset in the batch to its row number in the dataframe'''
+    offsets = set()
+    for error in cursor.getbatcherrors():
+        print(f"Error processing row {row_numbers[error.offset]} in {table_name}: {error.message}")
+        offsets.add(error.offset)
+    return offsets
+
+
+def _bind_timestamps(cursor, dtypes):
+    '''bind the datetime columns as TIMESTAMP on the next execute rather than as DATE
+
+    dtypes: dtypes of the bound columns in placeholder order'''
+    sizes = [oracledb.DB_TYPE_TIMESTAMP if pd.api.types.is_datetime64_any_dtype(dtype) else None
+             for dtype in dtypes]
+    if any(sizes):
+        cursor.setinputsizes(*sizes)
+
+
+def upsert_insert_data(table_name, df, cursor, batch_size=None, key_columns=None):
+    '''insert or update table
+
+    batch_size: rows per round trip, None sends the rows one by one
+    key_columns: columns matched to decide update or insert, defaults to the first column
+    returns the update / insert / error counts for the table'''
+
+    key_columns = list(key_columns or [df.columns[0]])
+
+    if batch_size:
+        return upsert_batch_data(table_name, df, cursor, batch_size, key_columns)
 
-def upsert_insert_data(table_name, df, cursor):
-    '''insert or update table'''
-    
     # Dictionary to store counts for each table
     table_counts = defaultdict(lambda: {'updates': 0, 'inserts': 0, 'errors': 0})
     
     # for table_name, df in table_dict.items():
     # Prepare the column names for the SQL statements
+    value_columns = [col for col in df.columns if col not in key_columns]
     columns = ', '.join(df.columns)
-    primary_key = df.columns[0]
-    update_columns = ', '.join([f"{col} = :{i+1}" for i, col in enumerate(df.columns) if col != primary_key])
     placeholders = ', '.join([f":{i+1}" for i in range(len(df.columns))])
 
     # print(f"\nProcessing table: {table_name}")
     
-    # MERGE statement for upsert
-    merge_sql = f"""
-    MERGE INTO {table_name} target
-    USING (SELECT {', '.join([f':{i+1} AS {col}' for i, col in enumerate(df.columns)])} FROM dual) source
-    ON (target.{primary_key} = source.{primary_key})
-    WHEN MATCHED THEN
-        UPDATE SET {update_columns}
-    WHEN NOT MATCHED THEN
-        INSERT ({columns})
-        VALUES ({placeholders})
+    # UPDATE on the key, INSERT when it matched no row. A MERGE reports 1
+    # row either way, so it cannot tell an update from an insert
+    update_sql = f"""
+    UPDATE {table_name}
+    SET {', '.join([f"{col} = :{i+1}" for i, col in enumerate(value_columns)])}
+    WHERE {' AND '.join([f"{col} = :{len(value_columns) + i + 1}" for i, col in enumerate(key_columns)])}
     """
+    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+
+    # key columns go last to match the WHERE placeholders
+    update_rows = bind_rows(df[value_columns + key_columns]) if value_columns else [None] * len(df)
+    update_dtypes = df[value_columns + key_columns].dtypes
+    dtypes = df.dtypes
         
     # Process each row with a progress bar
-    for row in tqdm(df.itertuples(index=False, name=None), 
-                    desc=f"Processing {table_name}", 
-                    total=len(df)):
+    for row, update_row in tqdm(zip(bind_rows(df), update_rows),
+                                desc=f"Processing {table_name}", 
+                                total=len(df)):
         try:
-            # Execute the MERGE statement for each row
-            cursor.execute(merge_sql, row)
-
-            # Check the number of rows affected
-            if cursor.rowcount == 1:
-                # If rowcount is 1, either an update or an insert occurred
+            if update_row is not None:
+                _bind_timestamps(cursor, update_dtypes)
+                cursor.execute(update_sql, update_row)
                 if cursor.rowcount > 0:
-                    # Increment insert or update count based on existence of the primary key in the target table
-                    table_counts[table_name]['inserts'] += 1
-                else:
-                    # Otherwise, it's an update
                     table_counts[table_name]['updates'] += 1
+                    continue
+
+            _bind_timestamps(cursor, dtypes)
+            cursor.execute(insert_sql, row)
+            table_counts[table_name]['inserts'] += cursor.rowcount
             
         except oracledb.DatabaseError as e:
             error, = e.args
@@ -59,34 +94,162 @@ def upsert_insert_data(table_name, df, cursor):
     # print(f"  Inserts: {table_counts[table_name]['inserts']}")
     # print(f"  Errors:  {table_counts[table_name]['errors']}")
 
-def insert_non_pk_data(table_name, df, cursor):
+    return table_counts[table_name]
 
-    table_counts = defaultdict(lambda: {'updates': 0, 'inserts': 0, 'errors': 0})
+def upsert_batch_data(table_name, df, cursor, batch_size=DEFAULT_BATCH_SIZE, key_columns=None):
+    '''insert or update table in array-bound chunks
 
-    # for table_name, df in (table_dict.items()):
-        # Prepare the insert SQL statement with placeholders for each column
+    Each chunk is one executemany UPDATE keyed on key_columns, the rows
+    it did not match are then sent as one executemany INSERT. Both run with
+    batcherrors so a bad row is reported instead of aborting the chunk, and
+    getarraydmlrowcounts tells exactly which rows were updated or inserted.
+    '''
+
+    table_counts = {'updates': 0, 'inserts': 0, 'errors': 0}
+
+    key_columns = list(key_columns or [df.columns[0]])
+    value_columns = [col for col in df.columns if col not in key_columns]
     columns = ', '.join(df.columns)
     placeholders = ', '.join([f":{i+1}" for i in range(len(df.columns))])
-    sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
 
+    update_sql = f"""
+    UPDATE {table_name}
+    SET {', '.join([f"{col} = :{i+1}" for i, col in enumerate(value_columns)])}
+    WHERE {' AND '.join([f"{col} = :{len(value_columns) + i + 1}" for i, col in enumerate(key_columns)])}
+    """
+    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
 
-        # Loop through DataFrame rows and insert into the table
-    for row in tqdm(df.itertuples(index=False, name=None), 
-                    desc=f"Processing {table_name}",
-                     total=len(df)):
-        try:
-            cursor.execute(sql, row)
-            if cursor.rowcount == 1:
-                if cursor.rowcount > 0:
-                    
-                    table_counts[table_name]['inserts'] += 1
-                else:
-                
-                    table_counts[table_name]['updates'] += 1
-        except oracledb.DatabaseError as e:
-            print(f"Error inserting data: {e}")
+    # a key repeated within a chunk would be inserted twice
+    df = df.drop_duplicates(subset=key_columns, keep='last')
+    rows = bind_rows(df)
+    # key columns go last to match the WHERE placeholders
+    update_rows = list(bind_rows(df[value_columns + key_columns])) if value_columns else []
 
-    # print(f"\nResults for {table_name}:")
-    # print(f"  Updates: {table_counts[table_name]['updates']}")
-    # print(f"  Inserts: {table_counts[table_name]['inserts']}")
-    # print(f"  Errors:  {table_counts[table_name]['errors']}")
\ No newline at end of file
+    for chunk_start in tqdm(range(0, len(rows), batch_size),
+                            desc=f"Processing {table_name}",
+                            total=-(-len(rows) // batch_size)):
+        chunk = rows[chunk_start:chunk_start + batch_size]
+        update_chunk = update_rows[chunk_start:chunk_start + batch_size]
+        failed = set()
+        missing = list(range(len(chunk)))
+
+        if update_chunk:
+            _bind_timestamps(cursor, df[value_columns + key_columns].dtypes)
+            cursor.executemany(update_sql, update_chunk, batcherrors=True, arraydmlrowcounts=True)
+            failed = _report_batch_errors(table_name, cursor, range(chunk_start, chunk_start + len(chunk)))
+            row_counts = cursor.getarraydmlrowcounts()
+            table_counts['updates'] += sum(row_counts)
+            missing = [i for i, count in enumerate(row_counts) if count == 0 and i not in failed]
+
+        if missing:
+            _bind_timestamps(cursor, df.dtypes)
+            cursor.executemany(insert_sql, [chunk[i] for i in missing], batcherrors=True, arraydmlrowcounts=True)
+            insert_failed = _report_batch_errors(table_name, cursor, [chunk_start + i for i in missing])
+            failed |= {missing[offset] for offset in insert_failed}
+            table_counts['inserts'] += sum(cursor.getarraydmlrowcounts())
+
+        table_counts['errors'] += len(failed)
+
+    return table_counts
+
+def staging_table_name(table_name):
+    '''name of the global temporary table used to stage loads into table_name'''
+    return f"{table_name}_stg"
+
+def ensure_staging_table(table_name, columns, cursor):
+    '''create the staging table for table_name if it does not exist yet
+
+    The staging table is a global temporary table shaped like the target,
+    its rows are private to the session and cleared on commit.'''
+
+    staging = staging_table_name(table_name)
+    cursor.execute("SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = UPPER(:1)", [staging])
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"""
+        CREATE GLOBAL TEMPORARY TABLE {staging}
+        ON COMMIT DELETE ROWS
+        AS SELECT {', '.join(columns)} FROM {table_name} WHERE 1 = 0
+        """)
+    return staging
+
+def drop_staging_table(table_name, cursor):
+    '''drop the staging table of table_name, used when the target is recreated'''
+
+    staging = staging_table_name(table_name)
+    cursor.execute("SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = UPPER(:1)", [staging])
+    if cursor.fetchone()[0] > 0:
+        cursor.execute(f"DROP TABLE {staging}")
+
+def staging_merge_data(table_name, df, cursor, key_columns, delete_missing=False,
+                       batch_size=DEFAULT_BATCH_SIZE):
+    '''load a table through a staging table and one set-based MERGE
+
+    The dataframe is array-inserted into the staging table, then a single
+    MERGE reconciles it with the target: matched keys are updated, new keys
+    inserted and, with delete_missing, target rows whose key is no longer
+    staged are deleted.
+
+    key_columns: natural key used to match staged and target rows
+    returns the update / insert / delete / error counts for the table'''
+
+    table_counts = {'updates': 0, 'inserts': 0, 'deletes': 0, 'errors': 0}
+
+    # MERGE needs one source row per key
+    df = df.drop_duplicates(subset=key_columns, keep='last')
+
+    staging = ensure_staging_table(table_name, df.columns, cursor)
+    cursor.execute(f"DELETE FROM {staging}")
+
+    columns = ', '.join(df.columns)
+    placeholders = ', '.join([f":{i+1}" for i in range(len(df.columns))])
+    insert_sql = f"INSERT INTO {staging} ({columns}) VALUES ({placeholders})"
+
+    rows = bind_rows(df)
+
+    for chunk_start in tqdm(range(0, len(rows), batch_size),
+                            desc=f"Staging {table_name}",
+                            total=-(-len(rows) // batch_size)):
+        chunk = rows[chunk_start:chunk_start + batch_size]
+        _bind_timestamps(cursor, df.dtypes)
+        cursor.executemany(insert_sql, chunk, batcherrors=True, arraydmlrowcounts=True)
+        failed = _report_batch_errors(table_name, cursor, range(chunk_start, chunk_start + len(chunk)))
+        table_counts['errors'] += len(failed)
+
+    match = ' AND '.join([f"target.{col} = source.{col}" for col in key_columns])
+    value_columns = [col for col in df.columns if col not in key_columns]
+
+    # staged keys already in the target are the rows the MERGE will update
+    cursor.execute(f"SELECT COUNT(*) FROM {staging} source WHERE EXISTS "
+                   f"(SELECT 1 FROM {table_name} target WHERE {match})")
+    matched = cursor.fetchone()[0]
+
+    update_clause = ''
+    if value_columns:
+        update_clause = f"""
+    WHEN MATCHED THEN
+        UPDATE SET {', '.join([f"target.{col} = source.{col}" for col in value_columns])}"""
+
+    merge_sql = f"""
+    MERGE INTO {table_name} target
+    USING {staging} source
+    ON ({match}){update_clause}
+    WHEN NOT MATCHED THEN
+        INSERT ({columns})
+        VALUES ({', '.join([f"source.{col}" for col in df.columns])})
+    """
+    cursor.execute(merge_sql)
+    merged = cursor.rowcount
+
+    table_counts['updates'] = matched if value_columns else 0
+    table_counts['inserts'] = merged - table_counts['updates']
+
+    if delete_missing:
+        cursor.execute(f"""
+        DELETE FROM {table_name} target
+        WHERE NOT EXISTS (SELECT 1 FROM {staging} source WHERE {match})
+        """)
+        table_counts['deletes'] = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM {staging}")
+
+    return table_counts
@@ -0,0 +1,133 @@
+import gzip
+import os
+import shutil
+from datetime import date
+
+"""
+Raw landing zone, the compressed API responses of an extract run
+
+Every bootstrap-static and element-summary body is kept as received in
+landing/<date>/ (bootstrap-static.json.gz, element-summary/<id>.json.gz),
+so transform and load can be re-driven from disk without the network,
+eg. main_flow(source='landing:2024-10-05'). Only the newest
+FPL_LANDING_KEEP days are kept.
+"""
+
+LANDING_DIR = os.getenv("FPL_LANDING_DIR", "landing")
+# landed days kept, older ones are removed after a run lands a new one, 0 keeps them all
+LANDING_KEEP = int(os.getenv("FPL_LANDING_KEEP", "7"))
+
+
+class LandingZone:
+    """
+    One dated directory of raw responses
+
+    Args:
+        day: landing date as 'YYYY-MM-DD', defaults to today
+        root: directory holding the dated landing directories
+        replay: serve requests from the landed files instead of the network
+    """
+
+    def __init__(self, day=None, root=None, replay=False):
+        self.day = day or date.today().isoformat()
+        self.root = root or LANDING_DIR
+        self.replay = replay
+
+    @property
+    def directory(self):
+        return os.path.join(self.root, self.day)
+
+    def path_for(self, url):
+        """
+        File of an API url in the landing zone, None for urls not landed
+
+        Args:
+            url: eg. https://fantasy.premierleague.com/api/element-summary/5/
+        """
+        parts = [part for part in url.split('?')[0].split('/') if part]
+        if parts and parts[-1] == 'bootstrap-static':
+            return os.path.join(self.directory, 'bootstrap-static.json.gz')
+        if len(parts) >= 2 and parts[-2] == 'element-summary' and parts[-1].isdigit():
+            return os.path.join(self.directory, 'element-summary', f'{parts[-1]}.json.gz')
+        return None
+
+    def save(self, url, body):
+        """Land a response body, written to a temporary file then renamed"""
+        path = self.path_for(url)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(f"{path}.tmp", 'wb', compresslevel=6) as f:
+            f.write(body)
+        os.replace(f"{path}.tmp", path)
+
+    def load(self, url):
+        """Landed body of a url, None if it was not landed"""
+        path = self.path_for(url)
+        if path is None or not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rb') as f:
+            return f.read()
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, 'bootstrap-static.json.gz'))
+
+
+def available_landings(root=None):
+    """
+    Dates with a landed bootstrap-static payload, oldest first
+
+    Returns:
+        list of 'YYYY-MM-DD'
+    """
+    root = root or LANDING_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(day for day in os.listdir(root) if LandingZone(day, root).exists())
+
+
+def prune_landings(keep=None, root=None):
+    """
+    Remove the oldest landing directories, keeping the newest ones
+
+    Args:
+        keep: landed days kept, defaults to FPL_LANDING_KEEP, 0 keeps them all
+        root: directory holding the dated landing directories
+    Returns:
+        list of the removed dates
+    """
+    keep = LANDING_KEEP if keep is None else keep
+    root = root or LANDING_DIR
+    if keep <= 0 or not os.path.isdir(root):
+        return []
+    # dated directories sort oldest first, incomplete landings included
+    days = sorted(day for day in os.listdir(root) if os.path.isdir(os.path.join(root, day)))
+    removed = days[:-keep]
+    for day in removed:
+        shutil.rmtree(os.path.join(root, day))
+    return removed
+
+
+def parse_source(source):
+    """
+    Landing zone a main_flow source points at
+
+    Args:
+        source: 'api' or 'landing:<YYYY-MM-DD>' ('landing:latest' for the newest)
+    Returns:
+        LandingZone replaying that date, None for the api
+    """
+    if source in (None, 'api'):
+        return None
+    kind, _, day = source.partition(':')
+    if kind != 'landing' or not day:
+        raise ValueError(f"Unknown source: {source}, expected 'api' or 'landing:<date>'")
+    if day == 'latest':
+        landings = available_landings()
+        if not landings:
+            raise ValueError(f"No landed extract found in {LANDING_DIR}")
+        day = landings[-1]
+    zone = LandingZone(day, replay=True)
+    if not zone.exists():
+        raise ValueError(f"No landed extract for {day} in {LANDING_DIR}")
+    return zone
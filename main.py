@@ -1,17 +1,13 @@
-from dbconn import connect_to_cloud_db
+import storage
 from base_scrapper import *
 from operations import *
 from create_database_table import *
 from generate_files import *
-from insert_update import upsert_insert_data
+from insert_update import DEFAULT_BATCH_SIZE
+from transform import transform_tables
 
 def main():
 
-    # hard coded seasons
-    seasons = ['2006-07','2007-08','2008-09','2009-10','2010-11','2011-12',
-            '2012-13','2013-14','2014-15','2015-16','2016-17','2017-18','2018-19',
-            '2019-20','2020-21','2021-22', '2022-23', '2023-24']
-    
     # get player ids to be used below
     player_ids = get_player_ids()
 
@@ -20,9 +16,10 @@ def main():
     players = get_player_stat()
     teams = get_team_stat()
     positions = get_positions()
-    fixtures = get_fixtures(player_ids)
-    history = get_history(player_ids)
-    history_past = get_history_past(player_ids)
+    summaries = get_player_summaries(player_ids) # one element-summary request per player
+    fixtures = summaries['fixtures']
+    history = summaries['history']
+    history_past = summaries['history_past']
 
     # tables and their respective data
     tables_data = {
@@ -34,37 +31,42 @@ def main():
             'history': history,
             'history_past': history_past
         }
+
+    # chip plays to their own table, nested fields to JSON
+    tables_data = transform_tables(tables_data)
     
-    # connect to the database
-    conn, cursor = connect_to_cloud_db()
+    # connect to the database, FPL_STORAGE_BACKEND=sqlite loads a local file instead
+    backend = storage.backend
+    conn, cursor = backend.connect()
     # conn, cursor = connect_to_db() # local connection
 
-    # create tables in the database
-    create_table(tables_data, cursor)
+    # create missing tables in the database, and the indexes the exports need
+    for table_name, df in tables_data.items():
+        if not backend.table_exists(cursor, table_name):
+            backend.create_table(cursor, table_name, df)
+            print(f"Table {table_name} created successfully.")
+        for index_name in backend.ensure_indexes(cursor, table_name):
+            print(f"Index {index_name} created on {table_name}.")
 
     # update or insert data into tables
     for table_name, df in (tables_data.items()):
-        upsert_insert_data(table_name, df, cursor)
+        backend.upsert(cursor, table_name, df, table_keys(table_name, df),
+                       batch_size=DEFAULT_BATCH_SIZE)
+
+    # Commit so the export sessions see the loaded data, then release the connection
+    conn.commit()
+    cursor.close()
+    conn.close()
 
     """
     uncomment to generate csv files if needed
     update sql query in generate_files.py as you seem fit
     """
-    # save season data as csv files (optional)
-    for season in seasons:
-        fetch_and_save_season_data(season, cursor)
+    # save season data, ongoing season and past seasons player data as csv files
+    # each export runs on its own pooled session, past seasons are read from history_past
+    export_all()
 
-    # generate csv file data for ongoing season
-    player_current_season_data(cursor)
-
-    # generate data for past seasons. Data only availabe from 2017-18 season
-    for season in seasons:
-        player_season_data(season, cursor)
-
-    # Commit and close the connection
-    conn.commit()
-    cursor.close()
-    conn.close()
+    backend.close()
 
 
 if __name__ == "__main__":
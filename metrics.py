@@ -0,0 +1,280 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+"""
+Run metrics of the pipeline
+
+The scrapper, the database cursors of the load and the flows record into
+the shared run_metrics while a run goes: HTTP latency histograms, bytes
+downloaded, retries, rows extracted per table, database round trips,
+load rates and seconds per stage. main_flow publishes them at the end of
+the run as a Prefect table artifact and, optionally, as a Prometheus
+textfile for the node_exporter textfile collector.
+"""
+
+# Prometheus textfile written after every run, unset writes none
+METRICS_TEXTFILE = os.getenv("FPL_METRICS_TEXTFILE")
+# prefix of every exported metric name
+METRIC_PREFIX = 'fpl_etl'
+
+# upper bounds in seconds of the HTTP latency histogram buckets
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# cursor calls that send a statement to the database
+ROUND_TRIP_CALLS = ('execute', 'executemany')
+
+# figures kept per table, rows extracted and the load report of fpl_etl.load_one_table
+TABLE_FIGURES = ('extracted', 'rows', 'skipped', 'inserts', 'updates', 'deletes', 'errors',
+                 'round_trips', 'seconds', 'rows_per_second')
+
+
+class Histogram:
+    """
+    Cumulative bucket counts, sum and count of observed values,
+    the shape of a Prometheus histogram
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations up to it) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((bound, total))
+        pairs.append((float('inf'), self.count))
+        return pairs
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q quantile, None without observations"""
+        if not self.count:
+            return None
+        for bound, total in self.cumulative():
+            if total >= q * self.count:
+                return bound
+
+
+class RunMetrics:
+    """
+    Thread safe store of the metrics of one pipeline run
+
+    Counters and histograms are keyed by name and labels, stages and
+    tables keep the per stage seconds and per table rows and load figures.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new run, dropping everything recorded so far"""
+        with self._lock:
+            self.started = time.time()
+            self.counters = defaultdict(float)
+            self.histograms = {}
+            self.stages = {}
+            self.tables = defaultdict(dict)
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def counter(self, name, **labels):
+        """Sum of a counter over the series matching labels"""
+        with self._lock:
+            return sum(value for (counter_name, series), value in self.counters.items()
+                       if counter_name == name and labels.items() <= dict(series).items())
+
+    def histogram(self, name):
+        """All series of a histogram merged into one"""
+        merged = Histogram()
+        with self._lock:
+            for (histogram_name, _), histogram in self.histograms.items():
+                if histogram_name == name:
+                    merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                    merged.count += histogram.count
+                    merged.sum += histogram.sum
+        return merged
+
+    @contextmanager
+    def stage(self, name):
+        """Time a with block as a stage of the run, repeated stages add up"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def record_extract(self, table_name, rows):
+        with self._lock:
+            self.tables[table_name]['extracted'] = rows
+
+    def record_load(self, report):
+        """Keep the load report of a table, see fpl_etl.load_one_table"""
+        with self._lock:
+            self.tables[report['table']].update(
+                {key: value for key, value in report.items() if key != 'table'})
+
+    def table_rows(self):
+        """
+        One row per table for the run artifact
+
+        Returns:
+            list of dicts with the same keys on every row
+        """
+        with self._lock:
+            return [{'table': table_name, **{figure: figures.get(figure) for figure in TABLE_FIGURES}}
+                    for table_name, figures in sorted(self.tables.items())]
+
+    def summary(self):
+        """Markdown summary of the stages and the HTTP traffic of the run"""
+        latency = self.histogram('http_request_seconds')
+        lines = ["| stage | seconds |", "|---|---|"]
+        lines += [f"| {stage} | {seconds:.3f} |" for stage, seconds in self.stages.items()]
+        lines += [
+            "",
+            f"HTTP: {int(self.counter('http_requests_total'))} requests, "
+            f"{self.counter('http_bytes_total') / 1e6:.1f} MB downloaded, "
+            f"{int(self.counter('http_retries_total'))} retries, "
+            f"{int(self.counter('http_failures_total'))} failures, "
+            f"p50 <= {latency.quantile(0.5)}s, p95 <= {latency.quantile(0.95)}s",
+            f"Database: {int(self.counter('db_round_trips_total'))} round trips, "
+            f"{self.counter('db_seconds_total'):.3f}s in database calls",
+        ]
+        return "\n".join(lines)
+
+    def prometheus(self, success=None):
+        """
+        The metrics of the run in the Prometheus text exposition format
+
+        Args:
+            success: outcome of the run, exported as run_success when given
+        """
+        samples = defaultdict(list)
+        with self._lock:
+            for (name, labels), value in self.counters.items():
+                samples[name].append((dict(labels), value))
+            for stage, seconds in self.stages.items():
+                samples['stage_seconds'].append(({'stage': stage}, seconds))
+            for table_name, figures in self.tables.items():
+                for figure in TABLE_FIGURES:
+                    if figures.get(figure) is not None:
+                        name = 'extract_rows' if figure == 'extracted' else f'load_{figure}'
+                        samples[name].append(({'table': table_name}, figures[figure]))
+            histograms = sorted(self.histograms.items())
+
+        samples['run_start_timestamp_seconds'].append(({}, self.started))
+        if success is not None:
+            samples['run_success'].append(({}, int(success)))
+
+        lines = []
+        for name, series in sorted(samples.items()):
+            kind = 'counter' if name.endswith('_total') else 'gauge'
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            lines += [f"{METRIC_PREFIX}_{name}{_labels(labels)} {_number(value)}"
+                      for labels, value in sorted(series, key=lambda sample: _labels(sample[0]))]
+
+        declared = set()
+        for (name, labels), histogram in histograms:
+            if name not in declared:
+                lines.append(f"# TYPE {METRIC_PREFIX}_{name} histogram")
+                declared.add(name)
+            labels = dict(labels)
+            for bound, total in histogram.cumulative():
+                lines.append(f"{METRIC_PREFIX}_{name}_bucket{_labels({**labels, 'le': _number(bound)})} {total}")
+            lines.append(f"{METRIC_PREFIX}_{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{METRIC_PREFIX}_{name}_count{_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path, success=None):
+        """
+        Write the Prometheus textfile, through a temporary file renamed
+        into place so the collector never reads half a file
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as f:
+            f.write(self.prometheus(success))
+        os.replace(temporary, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = {key: str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for key, value in labels.items()}
+    return '{' + ','.join(f'{key}="{value}"' for key, value in sorted(escaped.items())) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+class CountingCursor:
+    """
+    Cursor proxy counting the round trips made through it
+
+    Every execute / executemany adds to round_trips and to the
+    db_round_trips_total and db_seconds_total counters of run_metrics,
+    everything else goes straight to the wrapped cursor.
+    """
+
+    def __init__(self, cursor, metrics=None):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_metrics', metrics or run_metrics)
+        object.__setattr__(self, 'round_trips', 0)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if name not in ROUND_TRIP_CALLS:
+            return attribute
+
+        def counted(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                object.__setattr__(self, 'round_trips', self.round_trips + 1)
+                self._metrics.inc('db_round_trips_total', call=name)
+                self._metrics.inc('db_seconds_total', time.perf_counter() - start, call=name)
+        return counted
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+# metrics of the current run, reset by main_flow
+run_metrics = RunMetrics()
@@ -1,9 +1,16 @@
+import os
 import pandas as pd
 import requests
 from tqdm import tqdm
 from base_scrapper import *
+from schemas import apply_schema
+from metrics import run_metrics
 
-with requests.Session() as session:
+# element-summary download settings, see fetch_player_summaries
+FETCH_CONCURRENCY = int(os.getenv("FPL_FETCH_CONCURRENCY", "8"))
+FETCH_RPS = float(os.getenv("FPL_FETCH_RPS", "20")) or None
+
+with new_session() as session:
         
     def get_gameweeks():
         """
@@ -18,27 +25,15 @@ with requests.Session() as session:
                 'most_selected','most_transferred_in','top_element','top_element_info','transfers_made',
                 'most_captained','most_vice_captained']]
         
-        df['deadline_time'] = pd.to_datetime(df['deadline_time'])
-       
-        df['deadline_time'] = df['deadline_time'].dt.strftime('%Y-%m-%d %I:%M %p')  # format to 'YYYY-MM-DD HH:MM AM/PM'
-        
-        """
-        due to the columns having list fields convert to str to
-        prevent Oracle from throwing errors during insertion
-        """
-        df['chip_plays'] = df['chip_plays'].apply(str)
-        df['top_element_info'] = df['top_element_info'].apply(str)
-
-        # Replace [] in columns with an empty string
-        df['chip_plays'] = df['chip_plays'].apply(lambda x: '' if x == [] else x) 
-        df['top_element_info'] = df['top_element_info'].apply(lambda x: '' if x == [] else x)
-
-        df = df.fillna(0) # Replace NaN values with 0
+        # chip_plays and top_element_info stay as parsed, transform_tables
+        # splits the chip plays into their own table and serializes the rest
+        nested = ['chip_plays', 'top_element_info']
+        df = df.fillna({col: 0 for col in df.columns if col not in nested}) # Replace NaN values with 0
 
         df = df.rename(
             columns={'id':'gameweek_id', 'top_element':'top_player', 'top_element_info':'top_player_info'})
 
-        return df
+        return apply_schema(df, 'gameweeks') # typed columns, deadline_time as a datetime
 
 
 
@@ -65,7 +60,7 @@ with requests.Session() as session:
         df = df.rename(columns={'id':'player_id','team':'team_id', 'code':'player_code', 'element_type':'pos_id',
                                 'minutes':'minutes_played','bonus':'total_bonus_pts'})
         
-        return df
+        return apply_schema(df, 'players')
 
 
 
@@ -81,7 +76,7 @@ with requests.Session() as session:
         df = df[['id', 'plural_name', 'singular_name','singular_name_short', 'element_count']]
         df = df.rename(columns={'id':'pos_id','singular_name_short':'position_name'}) # rename column
 
-        return df
+        return apply_schema(df, 'positions')
 
 
     # get teams info
@@ -100,91 +95,140 @@ with requests.Session() as session:
 
         df = df.rename(columns={'id':'team_id', 'name':'team_name', 'short_name':'team_short_name'})
 
-        return df
+        return apply_schema(df, 'teams')
 
     def get_player_ids():
         """
         Retrieve the IDs of players from player data
         The IDs are used to get individual player statistics and fixtures
         """
-        df = get_data("elements", session)
-        player_ids = df['id'].to_list()
+        elements = bootstrap_snapshot.load(session).get('elements', [])
+        player_ids = [element['id'] for element in elements]
 
         return player_ids
 
-    def get_fixtures(player_ids):
+    def get_player_summaries(player_ids):
         """
-        Get players fixtures
+        Fetch every player's element-summary once and split it into
+        fixtures, history and history_past dataframes
+
+        Args:
+            player_ids: list of player ids
+
+        Returns:
+            dict of pandas dataframes keyed by 'fixtures', 'history', 'history_past'
+            and the ids of the players whose fetch failed under 'failed'
         """
-        all_fixtures = []
-        
-        for player_id in tqdm(player_ids, total=len(player_ids), desc="Fetching individual player fixture data"):
-            player_data = fetch_player_data(player_id, session)
-            
+        all_fixtures = ColumnBuilder()
+        all_history = ColumnBuilder()
+        all_history_past = ColumnBuilder()
+
+        failed = []
+        summaries = iter_player_summaries(player_ids, concurrency=FETCH_CONCURRENCY, rps=FETCH_RPS)
+
+        for player_id, player_data in zip(player_ids, summaries):
             if player_data is not None:
-                fixtures = player_data.get('fixtures', [])
+                # Append the records column by column, the payload is dropped afterwards
+                all_fixtures.extend(player_data.get('fixtures', []))
+                all_history.extend(player_data.get('history', []))
+                all_history_past.extend(player_data.get('history_past', []))
+                run_metrics.inc('player_summaries_total', outcome='fetched')
+            else:
+                failed.append(player_id)
+                run_metrics.inc('player_summaries_total', outcome='failed')
+
+        return {
+            'fixtures': fixtures_frame(all_fixtures.columns),
+            'history': history_frame(all_history.columns),
+            'history_past': history_past_frame(all_history_past.columns),
+            'failed': failed
+        }
+
+    def fixtures_frame(all_fixtures):
+        """
+        Build the fixtures dataframe from element-summary fixture records,
+        a list of dicts or a dict of column lists
+        """
+        if not all_fixtures:
+            return pd.DataFrame()
 
-                # Append data to lists
-                all_fixtures.extend(fixtures)
-                
         # Convert lists to DataFrames
-        df_fixtures = pd.DataFrame(all_fixtures)
+        df_fixtures = apply_schema(pd.DataFrame(all_fixtures), 'fixtures')
 
-        df_fixtures['kickoff_time'] = pd.to_datetime(df_fixtures['kickoff_time'])
-        df_fixtures['kickoff_time'] = df_fixtures['kickoff_time'].dt.strftime('%Y-%m-%d %I:%M %p')
+        # every player of a team lists the same fixtures, keep one row per fixture and side
+        df_fixtures = df_fixtures.drop_duplicates(subset=['id', 'is_home']).reset_index(drop=True)
         
         return df_fixtures
 
-
-    def get_history(player_ids):
+    def history_frame(all_history):
         """
-        Get past gameweeks stats for each player
+        Build the gameweek history dataframe from element-summary history records,
+        a list of dicts or a dict of column lists
         """
-        
-        all_history = []
-        
-        for player_id in tqdm(player_ids, total=len(player_ids), desc="Fetching individual player gameweek history data"):
-            player_data = fetch_player_data(player_id, session)
-            
-            if player_data is not None:
-                history = player_data.get('history', [])
-                
-                # Append data to lists
-                all_history.extend(history)
-                
+        if not all_history:
+            return pd.DataFrame()
+
         # Convert lists to DataFrames
         df_history = pd.DataFrame(all_history)
-
-        df_history['kickoff_time'] = pd.to_datetime(df_history['kickoff_time'])
-        df_history['kickoff_time'] = df_history['kickoff_time'].dt.strftime('%Y-%m-%d %I:%M %p')
         df_history = df_history.fillna(0) # Replace NaN values with 0
 
-        return df_history
-    
-    def get_history_past(player_ids):
+        return apply_schema(df_history, 'history')
+
+    def history_past_frame(all_history_past):
         """
-        Get past season stats for individual players
+        Build the past seasons dataframe from element-summary history_past records,
+        a list of dicts or a dict of column lists
         """
-        all_history_past = []
-        
-        for player_id in tqdm(player_ids, total=len(player_ids), desc="Fetching individual player past seasons stats"):
-            player_data = fetch_player_data(player_id, session)
-            
-            if player_data is not None:
-                history_past = player_data.get('history_past', [])
-                
-                # Append data to lists
-                all_history_past.extend(history_past)
-                
+        if not all_history_past:
+            return pd.DataFrame()
+
         # Convert lists to DataFrames
         df_history_past = pd.DataFrame(all_history_past)
         df_history_past['season_name'] = df_history_past['season_name'].str.replace('/', '-')
+        df_history_past = apply_schema(df_history_past, 'history_past')
         
         # desired_pk_column = 'element_code'
         # Move the desired pk column to the front
         # df_history_past = df_history_past[[desired_pk_column] + [col for col in df_history_past.columns if col != desired_pk_column]]
        
         return df_history_past
+
+    def last_checked_gameweek():
+        """
+        Latest gameweek that is finished and data checked, 0 before the first one
+        Rows of rounds up to it no longer change
+        """
+        events = bootstrap_snapshot.load(session).get('events', [])
+        checked = [event['id'] for event in events if event['finished'] and event['data_checked']]
+
+        return max(checked, default=0)
+
+    def current_season():
+        """
+        Season name of the bootstrap data in history_past format eg. '2024-25'
+        """
+        events = bootstrap_snapshot.load(session).get('events', [])
+        start_year = int(events[0]['deadline_time'][:4])
+
+        return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+    def get_fixtures(player_ids):
+        """
+        Get players fixtures
+        """
+        return get_player_summaries(player_ids)['fixtures']
+
+    def get_history(player_ids):
+        """
+        Get past gameweeks stats for each player
+        """
+        return get_player_summaries(player_ids)['history']
+    
+    def get_history_past(player_ids):
+        """
+        Get past season stats for individual players
+        """
+        return get_player_summaries(player_ids)['history_past']
     
     
 
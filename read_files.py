@@ -0,0 +1,93 @@
+import glob
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # parquet files need pyarrow
+    pq = None
+
+"""
+Helpers to load the parquet files written by generate_files.py
+(FPL_EXPORT_FORMATS=parquet or csv,parquet).
+
+Only the requested columns are read from disk and the season readers only
+open the files of the requested seasons. Column names are the exported
+ones, upper case as returned by Oracle eg. ['NAME', 'TOTAL_POINTS'].
+"""
+
+
+def read_parquet_files(paths, columns=None, filters=None):
+    """
+    Read parquet files into one DataFrame
+
+    Args:
+        paths: list of parquet file paths
+        columns: list of columns to read, None reads all
+        filters: pyarrow filters eg. [('GAMEWEEK', '=', 'Gameweek 1')],
+                 row groups whose statistics rule them out are skipped
+    Returns:
+        DataFrame
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required to read parquet files, pip install pyarrow")
+    tables = [pq.read_table(path, columns=columns, filters=filters) for path in paths]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([table.to_pandas() for table in tables], ignore_index=True)
+
+
+def season_files(pattern, seasons=None, data_dir='data'):
+    """
+    Latest parquet file of every requested season matching pattern
+
+    Args:
+        pattern: file pattern inside a season folder eg. 'season_stats.*.parquet'
+        seasons: list of seasons eg. ['2022-23'], None for all seasons
+        data_dir: folder holding the season folders
+    """
+    paths = []
+    for folder in sorted(glob.glob(os.path.join(data_dir, '*'))):
+        if seasons is not None and os.path.basename(folder) not in seasons:
+            continue
+        matches = sorted(glob.glob(os.path.join(folder, pattern)))
+        if matches:
+            paths.append(matches[-1])  # timestamped names sort oldest first
+    return paths
+
+
+def read_season_data(seasons=None, columns=None, data_dir='data'):
+    """
+    Season stats of the past seasons from data/season
+
+    Args:
+        seasons: list of seasons eg. ['2022-23', '2023-24'], None for all
+        columns: list of columns to read, None reads all
+    """
+    paths = season_files('season_stats.*.parquet', seasons, os.path.join(data_dir, 'season'))
+    return read_parquet_files(paths, columns)
+
+
+def read_player_season_data(seasons=None, columns=None, data_dir='data'):
+    """
+    Players stats of the past seasons from data/players
+
+    Args:
+        seasons: list of seasons eg. ['2022-23', '2023-24'], None for all
+        columns: list of columns to read, None reads all
+    """
+    paths = season_files('players_*_stats.parquet', seasons, os.path.join(data_dir, 'players'))
+    return read_parquet_files(paths, columns)
+
+
+def read_current_season_data(columns=None, gameweeks=None, data_dir='data'):
+    """
+    Players stats of the ongoing season from data/current_season_stats.parquet
+
+    Args:
+        columns: list of columns to read, None reads all
+        gameweeks: list of gameweek names eg. ['Gameweek 1'], None for all
+    """
+    filters = [('GAMEWEEK', 'in', gameweeks)] if gameweeks else None
+    return read_parquet_files([os.path.join(data_dir, 'current_season_stats.parquet')], columns, filters)
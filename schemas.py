@@ -0,0 +1,174 @@
+import logging
+import pandas as pd
+
+"""
+Declared column types of the extracted tables
+
+Every column maps to the pandas dtype it gets at extraction and the
+Oracle type it gets when its table is created. Columns not declared
+here keep the dtype pandas infers and the Oracle type create_table_query
+derives from it.
+"""
+
+INT16 = ('int16', 'NUMBER(5)')
+INT32 = ('int32', 'NUMBER(10)')
+INT64 = ('int64', 'NUMBER(19)')
+DECIMAL = ('float32', 'NUMBER')
+BOOL = ('bool', 'VARCHAR2(10)')
+TIMESTAMP = ('datetime64[ns]', 'TIMESTAMP')
+CATEGORY = ('category', 'VARCHAR2(50)')
+
+
+def text(length):
+    return ('object', f'VARCHAR2({length})')
+
+
+# stats shared by players, history and history_past
+PLAYER_STATS = {
+    'goals_scored': INT16, 'assists': INT16, 'clean_sheets': INT16, 'goals_conceded': INT16,
+    'own_goals': INT16, 'penalties_saved': INT16, 'penalties_missed': INT16, 'yellow_cards': INT16,
+    'red_cards': INT16, 'saves': INT16, 'bps': INT16, 'starts': INT16,
+    'influence': DECIMAL, 'creativity': DECIMAL, 'threat': DECIMAL, 'ict_index': DECIMAL,
+    'expected_goals': DECIMAL, 'expected_assists': DECIMAL, 'expected_goal_involvements': DECIMAL,
+    'expected_goals_conceded': DECIMAL,
+}
+
+SCHEMAS = {
+    'gameweeks': {
+        'gameweek_id': INT16, 'name': text(50), 'deadline_time': TIMESTAMP, 'deadline_time_epoch': INT64,
+        'average_entry_score': INT16, 'finished': BOOL, 'data_checked': BOOL, 'highest_score': INT16,
+        'ranked_count': INT32, 'most_selected': INT32,
+        'most_transferred_in': INT32, 'top_player': INT32, 'top_player_info': text(4000),
+        'transfers_made': INT32, 'most_captained': INT32, 'most_vice_captained': INT32,
+    },
+    'chip_plays': {
+        'gameweek_id': INT16, 'chip_name': CATEGORY, 'num_played': INT32,
+    },
+    'players': {
+        'player_id': INT32, 'first_name': text(255), 'second_name': text(255), 'web_name': text(255),
+        'player_code': INT32, 'pos_id': INT16, 'event_points': INT16, 'total_points': INT16,
+        'minutes_played': INT16, 'selected_by_percent': DECIMAL, 'form': DECIMAL, 'photo': text(255),
+        'points_per_game': DECIMAL, 'status': CATEGORY, 'team_id': INT16, 'team_code': INT16,
+        'region': INT16, 'total_bonus_pts': INT16, **PLAYER_STATS,
+    },
+    'teams': {
+        'team_id': INT16, 'code': INT16, 'team_name': text(255), 'team_short_name': CATEGORY,
+        'win': INT16, 'draw': INT16, 'loss': INT16, 'played': INT16, 'points': INT16, 'position': INT16,
+        'strength': INT16, 'strength_overall_home': INT16, 'strength_overall_away': INT16,
+        'strength_attack_home': INT16, 'strength_attack_away': INT16, 'strength_defence_home': INT16,
+        'strength_defence_away': INT16,
+    },
+    'positions': {
+        'pos_id': INT16, 'plural_name': text(255), 'singular_name': text(255), 'position_name': CATEGORY,
+        'element_count': INT16,
+    },
+    'fixtures': {
+        'id': INT32, 'code': INT32, 'team_h': INT16, 'team_h_score': INT16, 'team_a': INT16,
+        'team_a_score': INT16, 'event': INT16, 'finished': BOOL, 'minutes': INT16,
+        'provisional_start_time': BOOL, 'kickoff_time': TIMESTAMP, 'event_name': CATEGORY,
+        'is_home': BOOL, 'difficulty': INT16,
+    },
+    'history': {
+        'element': INT32, 'fixture': INT32, 'opponent_team': INT16, 'total_points': INT16,
+        'was_home': BOOL, 'kickoff_time': TIMESTAMP, 'team_h_score': INT16, 'team_a_score': INT16,
+        'round': INT16, 'minutes': INT16, 'bonus': INT16, 'value': INT16, 'transfers_balance': INT32,
+        'selected': INT32, 'transfers_in': INT32, 'transfers_out': INT32, **PLAYER_STATS,
+    },
+    'history_past': {
+        'season_name': CATEGORY, 'element_code': INT32, 'start_cost': INT16, 'end_cost': INT16,
+        'total_points': INT16, 'minutes': INT16, 'bonus': INT16, **PLAYER_STATS,
+    },
+}
+
+
+def apply_schema(df, table_name):
+    """
+    Cast the declared columns of a table to their dtypes
+
+    Numeric strings are parsed (unparseable values become NaN), integer
+    columns holding missing values use the nullable Int dtypes, integer
+    columns holding fractions keep their parsed float dtype and datetimes
+    are parsed to timezone naive UTC.
+
+    Args:
+        dataframe, table name
+    Returns:
+        dataframe with the declared dtypes
+    """
+    converted = {}
+    for col, (dtype, _) in SCHEMAS.get(table_name, {}).items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if dtype.startswith(('int', 'float')):
+            series = pd.to_numeric(series, errors='coerce')
+            if dtype.startswith('int') and (series.dropna() % 1 != 0).any():
+                # a fraction in a declared integer column, astype would truncate it
+                logging.warning(f"Keeping {table_name}.{col} as {series.dtype}, not {dtype}: it holds fractions")
+                converted[col] = series
+                continue
+            if dtype.startswith('int') and series.isna().any():
+                dtype = dtype.capitalize()  # nullable Int16 / Int32 / Int64
+            try:
+                converted[col] = series.astype(dtype)
+            except (TypeError, ValueError) as e:
+                # eg. a nullable Int dtype refusing a value out of its range, keep it as parsed
+                logging.warning(f"Keeping {table_name}.{col} as {series.dtype}, not {dtype}: {e}")
+                converted[col] = series
+        elif dtype.startswith('datetime64'):
+            converted[col] = pd.to_datetime(series, utc=True).dt.tz_localize(None)
+        elif dtype == 'bool' and series.isna().any():
+            converted[col] = series.astype('boolean')
+        else:
+            converted[col] = series.astype(dtype)
+    return df.assign(**converted)
+
+
+def oracle_type(table_name, column, dtype):
+    """
+    Oracle column type, the declared one or one derived from the dtype
+
+    Args:
+        table name, column name, pandas dtype of the column
+    """
+    declared = SCHEMAS.get(table_name, {}).get(column)
+    if declared is not None:
+        return declared[1]
+
+    # Map pandas data types to Oracle SQL data types
+    if pd.api.types.is_bool_dtype(dtype):
+        return "VARCHAR2(10)"
+    elif pd.api.types.is_integer_dtype(dtype):
+        return "NUMBER"
+    elif pd.api.types.is_float_dtype(dtype):
+        return "FLOAT"
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return "DATE"
+    return "VARCHAR2(255)"
+
+
+def bind_rows(df):
+    """
+    Rows of a dataframe as tuples of plain Python values for executemany
+
+    NaN, NA and NaT become None (NULL), float32 values are sent as their
+    shortest decimal form rather than their binary expansion, categoricals
+    as their values and datetimes as datetime.datetime.
+
+    Args:
+        dataframe
+    Returns:
+        list of tuples
+    """
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == 'float32':
+            series = series.astype(str).astype('float64')
+        values = series.astype(object).tolist()
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            values = [value.to_pydatetime() if not pd.isna(value) else None for value in values]
+        elif series.hasnans:
+            values = [None if missing else value for value, missing in zip(values, series.isna().tolist())]
+        columns.append(values)
+    return list(zip(*columns))
@@ -0,0 +1,211 @@
+import os
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from read_files import season_files
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # the csv files are read instead
+    pq = None
+
+"""
+In-memory player stats store over the files written by generate_files.py
+
+StatsStore reads the player season files (data/players/<season>) and the
+current season file (data/current_season_stats) once, and indexes them
+by player, team, position, season and gameweek. A lookup reads the row
+positions from the index instead of filtering a whole file, and a
+season or gameweek range is a binary search over the rows of the key:
+
+    store = StatsStore()
+    store.seasons(web_name='Salah')                       # player across seasons
+    store.gameweeks(team='Arsenal', first=5, last=10)     # team in gameweeks 5 to 10
+
+Keys are the exported column names in lower case. Parquet files are
+preferred when pyarrow is installed, both formats are memory-mapped.
+"""
+
+# indexed columns of the player season rows, the ones present in the files are indexed.
+# CURRENT_TEAM is the player's team now on every season row, history_past has no team
+SEASON_INDEXES = ('WEB_NAME', 'PLAYER_ID', 'ELEMENT_CODE', 'CURRENT_TEAM', 'POS_ID', 'POSITION_NAME', 'SEASON_NAME')
+# indexed columns of the current season rows
+GAMEWEEK_INDEXES = ('WEB_NAME', 'PLAYER_ID', 'ELEMENT_CODE', 'TEAM', 'POSITION_NAME', 'OPPONENT', 'GAMEWEEK_ID')
+
+_NO_ROWS = np.array([], dtype=np.intp)
+
+
+class IndexedFrame:
+    """
+    A DataFrame sorted on an ordinal column (season, gameweek) with a hash
+    index of row positions for each indexed column
+
+    The positions of every key are ascending, so the rows of a key are in
+    ordinal order and an ordinal range is found by binary search.
+    """
+
+    def __init__(self, df, ordinal, index_columns):
+        self.df = df.sort_values(ordinal, kind='stable').reset_index(drop=True)
+        self.ordinal = self.df[ordinal].to_numpy()
+        self.indexes = {col: self.df.groupby(col, sort=False).indices
+                        for col in index_columns if col in self.df.columns}
+
+    def __len__(self):
+        return len(self.df)
+
+    def positions(self, first=None, last=None, **keys):
+        """
+        Row positions matching every key, within the ordinal range
+
+        Args:
+            first, last: inclusive ordinal bounds, None leaves that side open
+            keys: indexed column in lower case and its value eg. team='Arsenal'
+        Returns:
+            ascending numpy array of row positions
+        """
+        if keys:
+            matches = []
+            for name, value in keys.items():
+                column = name.upper()
+                if column not in self.indexes:
+                    raise KeyError(f"{column} is not indexed, indexed columns: {', '.join(self.indexes)}")
+                matches.append(self.indexes[column].get(value, _NO_ROWS))
+            # intersecting from the smallest match keeps the work to the rows of the rarest key
+            positions = reduce(np.intersect1d, sorted(matches, key=len))
+            ordinals = self.ordinal[positions]
+        else:
+            positions = None
+            ordinals = self.ordinal
+
+        start = 0 if first is None else np.searchsorted(ordinals, first, side='left')
+        stop = len(ordinals) if last is None else np.searchsorted(ordinals, last, side='right')
+        if positions is None:
+            return np.arange(start, stop)
+        return positions[start:stop]
+
+    def rows(self, first=None, last=None, **keys):
+        """The matching rows as a DataFrame, see positions"""
+        return self.df.take(self.positions(first, last, **keys))
+
+
+def read_stats_file(path):
+    """
+    Read one exported file, memory-mapped
+
+    Args:
+        path: csv or parquet file path
+    Returns:
+        DataFrame, column names in upper case as exported from Oracle
+    """
+    if path.endswith('.parquet'):
+        if pq is None:
+            raise ImportError("pyarrow is required to read parquet files, pip install pyarrow")
+        df = pq.read_table(path, memory_map=True).to_pandas()
+    else:
+        df = pd.read_csv(path, memory_map=True)
+    # the sqlite backend exports lower case names
+    df.columns = df.columns.str.upper()
+    return df
+
+
+class StatsStore:
+    """
+    Player season and current season stats loaded once and indexed for lookups
+
+    Args:
+        data_dir: folder the exports were written to
+        formats: file formats to look for, in order of preference
+    """
+
+    def __init__(self, data_dir='data', formats=('parquet', 'csv')):
+        self.data_dir = data_dir
+        self.formats = [fmt for fmt in formats if fmt != 'parquet' or pq is not None]
+        self.load()
+
+    def season_paths(self):
+        """Latest file of every season in data/players, in the preferred format"""
+        directory = os.path.join(self.data_dir, 'players')
+        paths = {}
+        for fmt in reversed(self.formats):
+            for path in season_files(f'players_*_stats.{fmt}', data_dir=directory):
+                paths[os.path.basename(os.path.dirname(path))] = path
+        return [paths[season] for season in sorted(paths)]
+
+    def current_season_path(self):
+        for fmt in self.formats:
+            path = os.path.join(self.data_dir, f'current_season_stats.{fmt}')
+            if os.path.exists(path):
+                return path
+        return None
+
+    def files(self):
+        """Every file the store reads, season files first"""
+        current_path = self.current_season_path()
+        return self.season_paths() + ([current_path] if current_path else [])
+
+    def load(self):
+        """Read every file and build the indexes"""
+        paths = self.season_paths()
+        seasons = (pd.concat([read_stats_file(path) for path in paths], ignore_index=True)
+                   if paths else pd.DataFrame(columns=['SEASON_NAME']))
+        self._seasons = IndexedFrame(seasons, 'SEASON_NAME', SEASON_INDEXES)
+
+        current_path = self.current_season_path()
+        current = read_stats_file(current_path) if current_path else pd.DataFrame(columns=['GAMEWEEK'])
+        if 'GAMEWEEK_ID' not in current.columns:
+            # files exported before GAMEWEEK_ID only have the gameweek name eg. 'Gameweek 8'
+            current['GAMEWEEK_ID'] = pd.to_numeric(current['GAMEWEEK'].astype(str).str.extract(r'(\d+)')[0])
+        self._gameweeks = IndexedFrame(current, 'GAMEWEEK_ID', GAMEWEEK_INDEXES)
+
+        self.paths = paths + ([current_path] if current_path else [])
+        self.modified = self._modified()
+
+    def _modified(self):
+        return {path: os.path.getmtime(path) for path in self.paths if os.path.exists(path)}
+
+    def refresh(self):
+        """
+        Reload the files if an export rewrote them since they were loaded
+
+        Returns:
+            True if the store was reloaded
+        """
+        if self.files() == self.paths and self._modified() == self.modified:
+            return False
+        self.load()
+        return True
+
+    def seasons(self, first=None, last=None, **keys):
+        """
+        Player season rows
+
+        Args:
+            first, last: inclusive season bounds eg. '2019-20', None leaves that side open
+            keys: web_name, player_id, element_code, current_team (the player's
+                  team now, not the one of that season), pos_id, position_name
+                  or season_name
+
+        Returns:
+            DataFrame in season order
+        """
+        return self._seasons.rows(first, last, **keys)
+
+    def gameweeks(self, first=None, last=None, **keys):
+        """
+        Current season rows, one per player and gameweek
+
+        Args:
+            first, last: inclusive gameweek numbers, None leaves that side open
+            keys: web_name, player_id, element_code, team, position_name, opponent or gameweek_id
+
+        Returns:
+            DataFrame in gameweek order
+        """
+        return self._gameweeks.rows(first, last, **keys)
+
+    def players(self):
+        """Web names of every player in the store"""
+        return sorted(set(self._seasons.indexes.get('WEB_NAME', {})) |
+                      set(self._gameweeks.indexes.get('WEB_NAME', {})))
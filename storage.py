@@ -0,0 +1,338 @@
+import os
+import sqlite3
+import zlib
+from contextlib import contextmanager
+import oracledb
+import pandas as pd
+from dbconn import connect_to_cloud_db, close_pool, pool_max
+from create_database_table import create_table_query, ensure_table_key, ensure_table_indexes
+from insert_update import (upsert_insert_data, staging_merge_data,
+                           ensure_staging_table, drop_staging_table, DEFAULT_BATCH_SIZE)
+from schemas import bind_rows
+
+"""
+Storage backends the pipeline loads into and exports from
+
+Every backend creates the tables, upserts dataframes and
+supplies the dialect specific bits of the export queries. OracleBackend
+is the Oracle database of dbconn.py, SQLiteBackend an embedded database
+file for local analytics and CI runs. FPL_STORAGE_BACKEND picks one.
+
+SQLiteBackend has a reduced interface: it loads every table with the
+same chunked UPDATE then INSERT whatever the load strategy, the strategy
+name is only validated, and neither backend appends rows without a key.
+"""
+
+# 'oracle' or 'sqlite'
+STORAGE_BACKEND = os.getenv("FPL_STORAGE_BACKEND", "oracle")
+# database file of the sqlite backend
+SQLITE_PATH = os.getenv("FPL_SQLITE_PATH", "data/fpl.sqlite")
+
+LOAD_STRATEGIES = ('row', 'batch', 'staging')
+
+
+class OracleBackend:
+    """
+    Oracle through the session pool of dbconn.py
+    """
+    name = 'oracle'
+    # sessions that can write at the same time
+    single_writer = False
+
+    def connect(self):
+        """Borrow a pooled session, closing the connection returns it"""
+        return connect_to_cloud_db()
+
+    def close(self):
+        close_pool()
+
+    def max_sessions(self):
+        """Sessions the pool hands out at the same time, ORACLE_POOL_MAX"""
+        return pool_max
+
+    def table_exists(self, cursor, table_name):
+        cursor.execute("SELECT COUNT(*) FROM USER_TABLES WHERE TABLE_NAME = UPPER(:1)", [table_name])
+        return cursor.fetchone()[0] > 0
+
+    def create_table(self, cursor, table_name, df):
+        cursor.execute(create_table_query(df, table_name))
+
+    def drop_table(self, cursor, table_name):
+        cursor.execute(f"DROP TABLE {table_name}")
+        drop_staging_table(table_name, cursor)
+
+    def ensure_table_key(self, cursor, table_name, df):
+        """Add the key to a table created before it had one, see create_database_table"""
+        return ensure_table_key(table_name, df, cursor)
+
+    def index_columns(self, cursor, table_name):
+        """Column lists of the indexes of a table, primary key included"""
+        cursor.execute("""SELECT INDEX_NAME, COLUMN_NAME FROM USER_IND_COLUMNS
+                          WHERE TABLE_NAME = UPPER(:1) ORDER BY INDEX_NAME, COLUMN_POSITION""", [table_name])
+        indexes = {}
+        for index_name, column_name in cursor.fetchall():
+            indexes.setdefault(index_name, []).append(column_name)
+        return list(indexes.values())
+
+    def ensure_indexes(self, cursor, table_name):
+        """Create the secondary indexes of TABLE_INDEXES the table is missing, returns their names"""
+        return ensure_table_indexes(table_name, self.index_columns(cursor, table_name), cursor)
+
+    def prepare_upsert(self, cursor, table_name, df, strategy='batch'):
+        """DDL an upsert needs before rows are loaded, the staging table"""
+        if strategy == 'staging':
+            ensure_staging_table(table_name, df.columns, cursor)
+
+    def upsert(self, cursor, table_name, df, key_columns, strategy='batch',
+               batch_size=DEFAULT_BATCH_SIZE, delete_missing=False):
+        """
+        Insert or update the rows of df on key_columns
+
+        Returns:
+            update / insert / (delete) / error counts
+        """
+        if strategy == 'staging':
+            return staging_merge_data(table_name, df, cursor, key_columns,
+                                      delete_missing, batch_size or DEFAULT_BATCH_SIZE)
+        elif strategy == 'batch':
+            return upsert_insert_data(table_name, df, cursor, batch_size or DEFAULT_BATCH_SIZE, key_columns)
+        elif strategy == 'row':
+            return upsert_insert_data(table_name, df, cursor, None, key_columns)
+        raise ValueError(f"Unknown load strategy '{strategy}' for table {table_name}")
+
+    def row_hash_sql(self, columns):
+        """SQL expression hashing the given column expressions of a row"""
+        row = " || '|' || ".join(columns)
+        return f"ora_hash({row})"
+
+    def export_dtypes(self, description):
+        """
+        Export dtype of every result column from its Oracle type, so a
+        column gets the same type in every exported file whatever its values
+
+        Args:
+            description: cursor.description of the export query
+        Returns:
+            list of 'int64', 'float64', 'datetime', 'object' or None where
+            the type does not say, eg. NUMBER without precision
+        """
+        dtypes = []
+        for _, type_code, _, _, precision, scale, _ in description:
+            if type_code is oracledb.DB_TYPE_NUMBER:
+                if precision and scale == 0:
+                    dtypes.append('int64')
+                elif precision and scale != 0:
+                    dtypes.append('float64')  # FLOAT and NUMBER(p, s)
+                else:
+                    dtypes.append(None)
+            elif type_code in (oracledb.DB_TYPE_BINARY_DOUBLE, oracledb.DB_TYPE_BINARY_FLOAT):
+                dtypes.append('float64')
+            elif type_code in (oracledb.DB_TYPE_DATE, oracledb.DB_TYPE_TIMESTAMP):
+                dtypes.append('datetime')
+            elif type_code in (oracledb.DB_TYPE_VARCHAR, oracledb.DB_TYPE_NVARCHAR, oracledb.DB_TYPE_CHAR,
+                               oracledb.DB_TYPE_NCHAR, oracledb.DB_TYPE_CLOB, oracledb.DB_TYPE_NCLOB):
+                dtypes.append('object')
+            else:
+                dtypes.append(None)
+        return dtypes
+
+
+def _row_hash(*values):
+    return zlib.crc32(repr(values).encode())
+
+
+class SQLiteBackend:
+    """
+    Embedded SQLite database file, no server and no round trips
+
+    Tables get the same DDL as in Oracle, SQLite maps the declared types to
+    its storage classes. Datetimes are stored as 'YYYY-MM-DD HH:MM:SS' text.
+    SQLite has a single writer, so tables load one at a time on one session.
+    """
+    name = 'sqlite'
+    single_writer = True
+
+    def __init__(self, path=None):
+        self.path = path or SQLITE_PATH
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        connection.create_function('fpl_row_hash', -1, _row_hash, deterministic=True)
+        return connection, connection.cursor()
+
+    def close(self):
+        pass
+
+    def max_sessions(self):
+        """One writer, every table shares the session"""
+        return 1
+
+    def table_exists(self, cursor, table_name):
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE",
+                       [table_name])
+        return cursor.fetchone()[0] > 0
+
+    def create_table(self, cursor, table_name, df):
+        cursor.execute(create_table_query(df, table_name))
+
+    def drop_table(self, cursor, table_name):
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+
+    def ensure_table_key(self, cursor, table_name, df):
+        # tables are always created with their key
+        return None
+
+    def index_columns(self, cursor, table_name):
+        cursor.execute(f"PRAGMA index_list({table_name})")
+        index_names = [row[1] for row in cursor.fetchall()]
+        indexes = []
+        for index_name in index_names:
+            cursor.execute(f'PRAGMA index_info("{index_name}")')
+            indexes.append([column_name for _, _, column_name in sorted(cursor.fetchall())])
+        return indexes
+
+    def ensure_indexes(self, cursor, table_name):
+        return ensure_table_indexes(table_name, self.index_columns(cursor, table_name), cursor)
+
+    def prepare_upsert(self, cursor, table_name, df, strategy='batch'):
+        pass
+
+    def rows(self, df):
+        """Rows to bind, datetimes formatted as text"""
+        datetimes = {col: df[col].dt.strftime('%Y-%m-%d %H:%M:%S') for col in df.columns
+                     if pd.api.types.is_datetime64_any_dtype(df[col].dtype)}
+        return bind_rows(df.assign(**datetimes) if datetimes else df)
+
+    def _execute_chunk(self, table_name, cursor, statements, table_counts):
+        """
+        Run (sql, rows, count) statements for one chunk, adding each statement's
+        row count to table_counts[count]. A failing chunk is rolled back and
+        replayed row by row so only the bad rows are rejected
+
+        The savepoint nests in the transaction of the session, opened here if
+        none is open yet, otherwise releasing it would commit the chunk and a
+        rollback of the load could not undo it
+        """
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")
+        cursor.execute("SAVEPOINT chunk")
+        try:
+            chunk_counts = []
+            for sql, rows, count in statements:
+                cursor.executemany(sql, rows)
+                chunk_counts.append((count, cursor.rowcount))
+            cursor.execute("RELEASE chunk")
+            for count, rowcount in chunk_counts:
+                table_counts[count] += rowcount
+            return
+        except sqlite3.DatabaseError:
+            cursor.execute("ROLLBACK TO chunk")
+            cursor.execute("RELEASE chunk")
+
+        for row_statements in zip(*[[(sql, row, count) for row in rows] for sql, rows, count in statements]):
+            try:
+                for sql, row, count in row_statements:
+                    cursor.execute(sql, row)
+                    table_counts[count] += cursor.rowcount
+            except sqlite3.DatabaseError as e:
+                print(f"Error processing row in {table_name}: {e}")
+                table_counts['errors'] += 1
+
+    def upsert(self, cursor, table_name, df, key_columns, strategy='batch',
+               batch_size=DEFAULT_BATCH_SIZE, delete_missing=False):
+        """
+        Insert or update the rows of df on key_columns, in chunks of an UPDATE
+        on the key then an INSERT of the rows whose key is not there yet.
+        The strategy is validated but not honoured, 'row', 'batch' and
+        'staging' all load this way. With delete_missing the keys of df
+        go to a temporary table and the rows missing from it are deleted
+        in the database.
+
+        Returns:
+            update / insert / delete / error counts
+        """
+        if strategy not in LOAD_STRATEGIES:
+            raise ValueError(f"Unknown load strategy '{strategy}' for table {table_name}")
+
+        table_counts = {'updates': 0, 'inserts': 0, 'deletes': 0, 'errors': 0}
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+        df = df.drop_duplicates(subset=key_columns, keep='last')
+        value_columns = [col for col in df.columns if col not in key_columns]
+
+        update_sql = f"""
+        UPDATE {table_name}
+        SET {', '.join([f"{col} = ?" for col in value_columns])}
+        WHERE {' AND '.join([f"{col} = ?" for col in key_columns])}
+        """
+        insert_sql = f"""
+        INSERT INTO {table_name} ({', '.join(df.columns)}) VALUES ({', '.join(['?'] * len(df.columns))})
+        ON CONFLICT DO NOTHING
+        """
+
+        rows = self.rows(df)
+        # key columns go last to match the WHERE placeholders
+        update_rows = self.rows(df[value_columns + key_columns]) if value_columns else []
+
+        for chunk_start in range(0, len(rows), batch_size):
+            statements = [(insert_sql, rows[chunk_start:chunk_start + batch_size], 'inserts')]
+            if update_rows:
+                statements.insert(0, (update_sql, update_rows[chunk_start:chunk_start + batch_size], 'updates'))
+            self._execute_chunk(table_name, cursor, statements, table_counts)
+
+        if delete_missing:
+            keys = ', '.join(key_columns)
+            # created from the target table, the keys compare with the same column affinity
+            cursor.execute(f"DROP TABLE IF EXISTS temp.{table_name}_keys")
+            cursor.execute(f"CREATE TEMP TABLE {table_name}_keys AS SELECT {keys} FROM {table_name} WHERE 0")
+            cursor.executemany(f"INSERT INTO temp.{table_name}_keys VALUES ({', '.join(['?'] * len(key_columns))})",
+                               self.rows(df[key_columns]))
+            cursor.execute(f"DELETE FROM {table_name} WHERE ({keys}) NOT IN (SELECT {keys} FROM temp.{table_name}_keys)")
+            table_counts['deletes'] = cursor.rowcount
+            cursor.execute(f"DROP TABLE temp.{table_name}_keys")
+
+        return table_counts
+
+    def row_hash_sql(self, columns):
+        return f"fpl_row_hash({', '.join(columns)})"
+
+    def export_dtypes(self, description):
+        """The sqlite description carries no types, the exported values decide"""
+        return [None] * len(description)
+
+
+BACKENDS = {'oracle': OracleBackend, 'sqlite': SQLiteBackend}
+
+
+def get_backend(name=None):
+    """
+    Backend instance by name, FPL_STORAGE_BACKEND by default
+
+    Args:
+        name: 'oracle' or 'sqlite'
+    """
+    name = (name or STORAGE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+# the backend used by the pipeline and the exports
+backend = get_backend()
+
+
+@contextmanager
+def connection():
+    """
+    Borrow a session of the configured backend for the duration of a with block
+
+    Yields:
+        tuple: connection, cursor
+    """
+    conn, cursor = backend.connect()
+    try:
+        yield conn, cursor
+    finally:
+        cursor.close()
+        conn.close()
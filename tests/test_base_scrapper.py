@@ -0,0 +1,164 @@
+import json
+import os
+import time
+
+import pytest
+
+import base_scrapper
+from benchmarks.stub_server import StubFPLServer, synthetic_summary
+from metrics import RunMetrics
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = RunMetrics()
+    monkeypatch.setattr(base_scrapper, 'run_metrics', metrics)
+    return metrics
+
+
+def serve(monkeypatch, **options):
+    """Start a stub server and point the scrapper at it"""
+    server = StubFPLServer(players=50, **options).start()
+    monkeypatch.setattr(base_scrapper, 'API_URL', server.url)
+    monkeypatch.setattr(base_scrapper, 'ELEMENT_SUMMARY_URL', server.url + '/element-summary/{player_id}/')
+    return server
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = serve(monkeypatch)
+    yield server
+    server.stop()
+
+
+def payload(player_id):
+    return json.loads(json.dumps(synthetic_summary(player_id)))
+
+
+def test_summaries_come_back_in_player_order(stub):
+    player_ids = [17, 3, 42, 8, 25, 1, 50, 33]
+
+    summaries = base_scrapper.fetch_player_summaries(player_ids, concurrency=4, backoff=0.01)
+
+    assert summaries == [payload(player_id) for player_id in player_ids]
+
+
+def test_failed_player_keeps_its_place(stub):
+    summaries = base_scrapper.fetch_player_summaries([2, 999, 4], concurrency=3, retries=0)
+
+    assert summaries == [payload(2), None, payload(4)]
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_retryable_status_is_retried(monkeypatch, metrics, status):
+    server = serve(monkeypatch, error_status=status, fail_first=2)
+    try:
+        with base_scrapper.new_session() as session:
+            data = base_scrapper.fetch_player_data(5, session, retries=3, backoff=0.01)
+    finally:
+        server.stop()
+
+    assert data == payload(5)
+    assert server.requests == 3
+    assert metrics.counter('http_retries_total', reason=str(status)) == 2
+
+
+def test_retries_give_up(monkeypatch, metrics):
+    server = serve(monkeypatch, error_status=503, fail_first=10)
+    try:
+        with base_scrapper.new_session() as session:
+            data = base_scrapper.fetch_player_data(5, session, retries=2, backoff=0.01)
+    finally:
+        server.stop()
+
+    assert data is None
+    assert server.requests == 3
+    assert metrics.counter('http_failures_total', reason='503') == 1
+
+
+def test_timeout_is_retried_then_fails(monkeypatch, metrics):
+    server = serve(monkeypatch, latency=0.5)
+    try:
+        with base_scrapper.new_session() as session:
+            data = base_scrapper.fetch_player_data(5, session, timeout=0.05, retries=1, backoff=0.01)
+    finally:
+        server.stop()
+
+    assert data is None
+    assert server.requests == 2
+    assert metrics.counter('http_retries_total', reason='connection') == 1
+    assert metrics.counter('http_failures_total', reason='connection') == 1
+
+
+def test_token_bucket_caps_the_rate():
+    limiter = base_scrapper.TokenBucket(rate=50, capacity=1)
+
+    start = time.perf_counter()
+    for _ in range(26):
+        limiter.acquire()
+
+    # one token in the bucket, the other 25 come at 50 per second
+    assert time.perf_counter() - start >= 0.45
+
+
+def test_rate_limited_fetch_spreads_requests(stub):
+    start = time.perf_counter()
+    summaries = base_scrapper.fetch_player_summaries(list(range(1, 31)), concurrency=8, rps=20)
+
+    # a second worth of burst, the other 10 requests at 20 per second
+    assert time.perf_counter() - start >= 0.45
+    assert all(summary is not None for summary in summaries)
+
+
+def test_cache_miss_fails_without_a_request(stub, metrics, monkeypatch, tmp_path):
+    cache = base_scrapper.HttpCache(str(tmp_path / 'http_cache.sqlite'), mode='offline')
+    monkeypatch.setattr(base_scrapper, 'http_cache', cache)
+    try:
+        with base_scrapper.new_session() as session:
+            data = base_scrapper.fetch_player_data(5, session, retries=3, backoff=0.01)
+    finally:
+        cache.close()
+
+    assert data is None
+    assert stub.requests == 0
+    assert metrics.counter('http_failures_total', reason='cache_miss') == 1
+    assert metrics.counter('http_retries_total') == 0
+
+
+def test_bootstrap_snapshot_is_reused_by_a_later_process(stub, monkeypatch, tmp_path):
+    monkeypatch.setattr(base_scrapper, 'BOOTSTRAP_URL', f'{stub.url}/bootstrap-static/')
+    path = str(tmp_path / 'bootstrap-static.json')
+    with base_scrapper.new_session() as session:
+        first = base_scrapper.BootstrapSnapshot(path=path).load(session)
+
+        # a new snapshot stands for the next flow run, a fresh process
+        snapshot = base_scrapper.BootstrapSnapshot(path=path)
+        snapshot.expire(ttl=60)
+        assert snapshot.load(session) == first
+        assert stub.requests == 1
+
+        # older than the ttl, it is fetched again
+        os.utime(path, (time.time() - 120, time.time() - 120))
+        snapshot = base_scrapper.BootstrapSnapshot(path=path)
+        snapshot.expire(ttl=60)
+        snapshot.load(session)
+        assert stub.requests == 2
+
+
+def test_concurrent_fetch_is_faster(monkeypatch):
+    server = serve(monkeypatch, latency=0.1)
+    try:
+        # different players in each run, so no response is revalidated from the http cache
+        start = time.perf_counter()
+        serial = base_scrapper.fetch_player_summaries(list(range(1, 17)), concurrency=1)
+        serial_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = base_scrapper.fetch_player_summaries(list(range(17, 33)), concurrency=8)
+        concurrent_seconds = time.perf_counter() - start
+    finally:
+        server.stop()
+
+    assert None not in serial + concurrent
+    # 16 round trips one after another against 2 rounds of 8
+    assert concurrent_seconds < serial_seconds / 3
@@ -0,0 +1,67 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from etl_state import (HISTORY_PAST_SEASON, HISTORY_WATERMARK, PLAYER_SNAPSHOT, PLAYER_SNAPSHOT_COLUMNS,
+                       row_fingerprints)
+
+# player 2 scores 0 points in 0 minutes every gameweek, its stats never move
+PLAYERS = pd.DataFrame({'player_id': [1, 2, 3], 'event_points': [6, 0, 2], 'minutes_played': [90, 0, 45]})
+
+
+@pytest.fixture
+def incremental(monkeypatch, tmp_path):
+    """fpl_etl with the API getters replaced, returns (module, fetched player id lists)"""
+    monkeypatch.chdir(tmp_path)  # fpl_etl logs to fpl_etl.log in the working directory
+    import fpl_etl
+
+    fetched = []
+
+    def get_player_summaries(player_ids):
+        fetched.append(list(player_ids))
+        history = pd.DataFrame([{'element': player_id, 'fixture': 100 * rnd + player_id, 'round': rnd,
+                                 'total_points': 0}
+                                for player_id in player_ids for rnd in range(1, 10)])
+        return {'fixtures': pd.DataFrame(), 'history': history, 'history_past': pd.DataFrame(), 'failed': []}
+
+    monkeypatch.setattr(fpl_etl, 'get_run_logger', lambda: logging.getLogger('test'))
+    monkeypatch.setattr(fpl_etl, 'get_gameweeks', pd.DataFrame)
+    monkeypatch.setattr(fpl_etl, 'get_team_stat', pd.DataFrame)
+    monkeypatch.setattr(fpl_etl, 'get_positions', pd.DataFrame)
+    monkeypatch.setattr(fpl_etl, 'get_player_stat', lambda: PLAYERS.copy())
+    monkeypatch.setattr(fpl_etl, 'current_season', lambda: '2024-25')
+    monkeypatch.setattr(fpl_etl, 'get_player_summaries', get_player_summaries)
+    return fpl_etl, fetched
+
+
+def load_state(watermark):
+    return {'watermark': watermark, 'history_past_season': '2024-25',
+            'player_snapshot': row_fingerprints(PLAYERS[PLAYER_SNAPSHOT_COLUMNS], ['player_id']).to_dict()}
+
+
+def test_new_checked_gameweek_fetches_every_player(incremental, monkeypatch):
+    fpl_etl, fetched = incremental
+    monkeypatch.setattr(fpl_etl, 'last_checked_gameweek', lambda: 9)
+
+    data = fpl_etl.extract_incremental([1, 2, 3], load_state(8))
+
+    assert fetched == [[1, 2, 3]]
+    history = data['history']
+    assert set(history['round']) == {9}
+    assert 2 in set(history['element'])  # the unchanged player gets its row of the new round
+    assert data['etl_state'][HISTORY_WATERMARK] == 9
+    assert HISTORY_PAST_SEASON not in data['etl_state']
+
+
+def test_inside_a_gameweek_only_changed_players_are_fetched(incremental, monkeypatch):
+    fpl_etl, fetched = incremental
+    monkeypatch.setattr(fpl_etl, 'last_checked_gameweek', lambda: 8)
+    monkeypatch.setattr(fpl_etl, 'get_player_stat',
+                        lambda: PLAYERS.assign(event_points=[6, 0, 5], minutes_played=[90, 0, 90]))
+
+    data = fpl_etl.extract_incremental([1, 2, 3], load_state(8))
+
+    assert fetched == [[3]]
+    assert list(data['etl_state'][PLAYER_SNAPSHOT].index) == ['3']
+    assert data['etl_state'][HISTORY_WATERMARK] == 8
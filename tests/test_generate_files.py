@@ -0,0 +1,123 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import generate_files
+import storage
+
+QUERY = "select s.season, s.player, s.points from stats s"
+
+
+@pytest.fixture
+def sqlite_stats(tmp_path, monkeypatch):
+    backend = storage.SQLiteBackend(str(tmp_path / 'fpl.sqlite'))
+    monkeypatch.setattr(storage, 'backend', backend)
+    conn, cursor = backend.connect()
+    cursor.execute("CREATE TABLE stats (season TEXT, player TEXT, points INTEGER)")
+    cursor.executemany("INSERT INTO stats VALUES (?, ?, ?)",
+                       [('2022-23', 'Salah', 239), ('2022-23', 'Kane', 263), ('2023-24', 'Salah', 211)])
+    conn.commit()
+    yield cursor
+    conn.close()
+
+
+def export(cursor, tmp_path, manifest):
+    return generate_files.export_changed_partitions(cursor, QUERY, 's.season', 'season', None,
+                                                    lambda season: str(tmp_path / f'{season}.csv'), manifest)
+
+
+def test_unchanged_partitions_are_skipped(sqlite_stats, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_files, 'EXPORT_FORMATS', ['csv'])
+    manifest = {}
+
+    assert export(sqlite_stats, tmp_path, manifest) == ['2022-23', '2023-24']
+    assert export(sqlite_stats, tmp_path, manifest) == []
+
+    sqlite_stats.execute("UPDATE stats SET points = 212 WHERE season = '2023-24'")
+    assert export(sqlite_stats, tmp_path, manifest) == ['2023-24']
+
+
+def test_new_format_rewrites_unchanged_partitions(sqlite_stats, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(generate_files, 'EXPORT_FORMATS', ['csv'])
+    manifest = {}
+    export(sqlite_stats, tmp_path, manifest)
+
+    monkeypatch.setattr(generate_files, 'EXPORT_FORMATS', ['csv', 'parquet'])
+    assert export(sqlite_stats, tmp_path, manifest) == ['2022-23', '2023-24']
+    for season in ('2022-23', '2023-24'):
+        assert manifest[season]['formats'] == ['csv', 'parquet']
+        assert os.path.exists(manifest[season]['files']['parquet'])
+    assert export(sqlite_stats, tmp_path, manifest) == []
+
+    os.remove(manifest['2022-23']['files']['parquet'])
+    assert export(sqlite_stats, tmp_path, manifest) == ['2022-23']
+
+
+def test_parquet_types_match_across_partitions(sqlite_stats, tmp_path, monkeypatch):
+    pq = pytest.importorskip('pyarrow.parquet')
+    monkeypatch.setattr(generate_files, 'EXPORT_FORMATS', ['parquet'])
+    sqlite_stats.execute("INSERT INTO stats VALUES ('2023-24', 'Kane', NULL)")
+    manifest = {}
+    export(sqlite_stats, tmp_path, manifest)
+
+    types = {season: pq.read_schema(manifest[season]['files']['parquet']).field('points').type
+             for season in ('2022-23', '2023-24')}
+    assert str(types['2022-23']) == str(types['2023-24']) == 'int64'
+
+
+def test_renamed_column_rewrites_every_partition(sqlite_stats, tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_files, 'EXPORT_FORMATS', ['csv'])
+    manifest = {}
+    export(sqlite_stats, tmp_path, manifest)
+
+    renamed = QUERY.replace('s.points', 's.points as total_points')
+    written = generate_files.export_changed_partitions(sqlite_stats, renamed, 's.season', 'season', None,
+                                                       lambda season: str(tmp_path / f'{season}.csv'), manifest)
+
+    assert written == ['2022-23', '2023-24']
+    with open(tmp_path / '2022-23.csv') as f:
+        assert f.readline().strip() == 'season,player,total_points'
+
+
+def test_current_season_csv_by_player_parquet_by_gameweek(sqlite_stats, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    sqlite_stats.execute("CREATE TABLE players (player_id INTEGER, web_name TEXT)")
+    sqlite_stats.execute("CREATE TABLE gameweeks (gameweek_id INTEGER, name TEXT)")
+    sqlite_stats.execute("CREATE TABLE history (element INTEGER, round INTEGER, total_points INTEGER)")
+    sqlite_stats.executemany("INSERT INTO players VALUES (?, ?)", [(1, 'Salah'), (2, 'Haaland')])
+    sqlite_stats.executemany("INSERT INTO gameweeks VALUES (?, ?)", [(1, 'Gameweek 1'), (2, 'Gameweek 2')])
+    sqlite_stats.executemany("INSERT INTO history VALUES (?, ?, ?)", [(1, 1, 6), (1, 2, 2), (2, 1, 13), (2, 2, 9)])
+    monkeypatch.setattr(generate_files, 'CURRENT_SEASON_QUERY',
+                        "select p.web_name, gws.name gameweek, h.total_points from history h "
+                        "join players p on p.player_id = h.element join gameweeks gws on gws.gameweek_id = h.round")
+    monkeypatch.setattr(generate_files, 'EXPORT_FORMATS', ['csv', 'parquet'])
+    monkeypatch.chdir(tmp_path)
+
+    generate_files.player_current_season_data(sqlite_stats)
+
+    csv = pd.read_csv('data/current_season_stats.csv')
+    assert list(zip(csv['web_name'], csv['gameweek'])) == [
+        ('Haaland', 'Gameweek 1'), ('Haaland', 'Gameweek 2'), ('Salah', 'Gameweek 1'), ('Salah', 'Gameweek 2')]
+    parquet = pd.read_parquet('data/current_season_stats.parquet')
+    assert list(zip(parquet['web_name'], parquet['gameweek'])) == [
+        ('Haaland', 'Gameweek 1'), ('Salah', 'Gameweek 1'), ('Haaland', 'Gameweek 2'), ('Salah', 'Gameweek 2')]
+
+
+def test_spooled_csv_matches_to_csv(tmp_path):
+    columns = ['ID', 'POINTS', 'NAME', 'DEADLINE', 'KICKOFF', 'UPDATED']
+    rows = [(1, 6, 'Salah', datetime(2024, 8, 16), datetime(2024, 8, 16, 20), datetime(2024, 8, 16, 1, 2, 3)),
+            (2, None, 'Kane', datetime(2024, 8, 24), datetime(2024, 8, 24, 15), datetime(2024, 8, 24, 1, 2, 3, 5000)),
+            (3, 2.5, None, None, None, datetime(2024, 8, 31, 1, 2, 3, 500))]
+    # one row per chunk, the last chunk alone decides none of the formats
+    spool = generate_files.ExportSpool(columns)
+    for row in rows:
+        spool.add([row])
+    path = tmp_path / 'spool.csv'
+
+    spool.write(str(path), ['csv'])
+
+    with open(path, newline='') as f:
+        assert f.read() == pd.DataFrame(rows, columns=columns).to_csv(index=False)
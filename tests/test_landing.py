@@ -0,0 +1,13 @@
+from landing import LandingZone, available_landings, prune_landings
+
+URL = 'https://fantasy.premierleague.com/api/bootstrap-static/'
+
+
+def test_prune_keeps_the_newest_landings(tmp_path):
+    root = str(tmp_path)
+    for day in ('2024-10-01', '2024-10-02', '2024-10-03', '2024-10-04'):
+        LandingZone(day, root).save(URL, b'{}')
+
+    assert prune_landings(keep=2, root=root) == ['2024-10-01', '2024-10-02']
+    assert available_landings(root) == ['2024-10-03', '2024-10-04']
+    assert prune_landings(keep=0, root=root) == []
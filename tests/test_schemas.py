@@ -0,0 +1,49 @@
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from schemas import apply_schema, bind_rows
+
+
+def test_integer_column_with_missing_values_is_nullable():
+    df = apply_schema(pd.DataFrame({'team_h_score': ['2', None], 'team_a_score': ['1', '0']}), 'fixtures')
+
+    assert df['team_h_score'].dtype == 'Int16'
+    assert df['team_a_score'].dtype == 'int16'
+    assert df['team_h_score'].isna().tolist() == [False, True]
+
+
+def test_fraction_in_an_integer_column_is_kept(caplog):
+    with caplog.at_level(logging.WARNING):
+        df = apply_schema(pd.DataFrame({'bonus': ['1', '2.5']}), 'history')
+
+    assert df['bonus'].tolist() == [1.0, 2.5]
+    assert 'Keeping history.bonus as float64, not int16' in caplog.text
+
+
+def test_categorical_column():
+    df = apply_schema(pd.DataFrame({'status': ['a', 'i', 'a']}), 'players')
+
+    assert isinstance(df['status'].dtype, pd.CategoricalDtype)
+    assert bind_rows(df[['status']]) == [('a',), ('i',), ('a',)]
+
+
+def test_missing_values_bind_as_none():
+    df = apply_schema(pd.DataFrame({'team_h_score': ['2', None],
+                                    'kickoff_time': ['2024-08-16T19:00:00Z', None],
+                                    'finished': [True, None]}), 'fixtures')
+
+    assert df['finished'].dtype == 'boolean'
+    assert bind_rows(df) == [(2, datetime(2024, 8, 16, 19), True), (None, None, None)]
+
+
+def test_float32_binds_its_shortest_decimal():
+    df = apply_schema(pd.DataFrame({'influence': ['12.3', '0.1', None]}), 'history')
+
+    assert df['influence'].dtype == 'float32'
+    assert float(np.float32(12.3)) != 12.3  # the binary expansion, eg. 12.300000190734863
+    rows = bind_rows(df)
+    assert rows[:2] == [(12.3,), (0.1,)]
+    assert rows[2] == (None,)
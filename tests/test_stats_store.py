@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+import pytest
+
+from stats_store import StatsStore
+
+SEASONS = {
+    '2022-23': [('Salah', 308, 'Liverpool', 'MID', 239), ('Kane', 1, 'Bayern', 'FWD', 263)],
+    '2023-24': [('Salah', 308, 'Liverpool', 'MID', 211), ('Saka', 5, 'Arsenal', 'MID', 202)],
+}
+GAMEWEEKS = [('Salah', 308, 'Liverpool', 'Arsenal', 'Gameweek 1', 1, 6),
+             ('Saka', 5, 'Arsenal', 'Liverpool', 'Gameweek 1', 1, 2),
+             ('Salah', 308, 'Liverpool', 'Chelsea', 'Gameweek 2', 2, 13),
+             ('Saka', 5, 'Arsenal', 'Everton', 'Gameweek 2', 2, 9),
+             ('Salah', 308, 'Liverpool', 'Everton', 'Gameweek 10', 10, 3)]
+GAMEWEEK_COLUMNS = ['WEB_NAME', 'PLAYER_ID', 'TEAM', 'OPPONENT', 'GAMEWEEK', 'GAMEWEEK_ID', 'TOTAL_POINTS']
+
+
+def write_gameweeks(data_dir, columns=GAMEWEEK_COLUMNS):
+    rows = pd.DataFrame(GAMEWEEKS, columns=GAMEWEEK_COLUMNS)
+    rows[columns].to_csv(os.path.join(data_dir, 'current_season_stats.csv'), index=False)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for season, rows in SEASONS.items():
+        directory = tmp_path / 'players' / season
+        os.makedirs(directory)
+        (pd.DataFrame(rows, columns=['WEB_NAME', 'PLAYER_ID', 'CURRENT_TEAM', 'POSITION_NAME', 'TOTAL_POINTS'])
+         .assign(SEASON_NAME=season)
+         .to_csv(directory / f'players_{season}_stats.csv', index=False))
+    write_gameweeks(str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def store(data_dir):
+    return StatsStore(data_dir, formats=('csv',))
+
+
+def test_point_lookup(store):
+    rows = store.seasons(web_name='Salah')
+    assert rows['SEASON_NAME'].to_list() == ['2022-23', '2023-24']
+    assert rows['TOTAL_POINTS'].to_list() == [239, 211]
+
+
+def test_multi_key_lookup(store):
+    rows = store.gameweeks(team='Liverpool', opponent='Everton')
+    assert rows['GAMEWEEK_ID'].to_list() == [10]
+
+
+def test_season_range(store):
+    rows = store.seasons(first='2023-24', position_name='MID')
+    assert rows['WEB_NAME'].to_list() == ['Salah', 'Saka']
+    assert store.seasons(last='2022-23')['WEB_NAME'].to_list() == ['Salah', 'Kane']
+
+
+def test_gameweek_range(store):
+    rows = store.gameweeks(first=2, last=10, web_name='Salah')
+    assert rows['TOTAL_POINTS'].to_list() == [13, 3]
+    assert len(store.gameweeks(first=2, last=2)) == 2
+
+
+def test_unknown_key_is_empty(store):
+    assert store.seasons(web_name='Haaland').empty
+    assert store.gameweeks(team='Liverpool', opponent='Fulham').empty
+
+
+def test_column_without_index(store):
+    with pytest.raises(KeyError, match='TOTAL_POINTS is not indexed'):
+        store.gameweeks(total_points=6)
+
+
+def test_gameweek_id_from_old_gameweek_names(data_dir):
+    write_gameweeks(data_dir, [col for col in GAMEWEEK_COLUMNS if col != 'GAMEWEEK_ID'])
+    store = StatsStore(data_dir, formats=('csv',))
+
+    # 'Gameweek 10' sorts after 'Gameweek 2' by number, not by name
+    assert store.gameweeks(web_name='Salah')['GAMEWEEK_ID'].to_list() == [1, 2, 10]
+    assert store.gameweeks(first=10)['TOTAL_POINTS'].to_list() == [3]
+
+
+def test_refresh_reloads_rewritten_files(store, data_dir):
+    assert store.refresh() is False
+
+    path = os.path.join(data_dir, 'current_season_stats.csv')
+    pd.read_csv(path).assign(TOTAL_POINTS=0).to_csv(path, index=False)
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+
+    assert store.refresh() is True
+    assert set(store.gameweeks()['TOTAL_POINTS']) == {0}
+    assert store.refresh() is False
@@ -0,0 +1,67 @@
+import oracledb
+import pandas as pd
+
+import storage
+
+TEAMS = pd.DataFrame({'team_id': [1, 2, 3], 'team_name': ['Arsenal', 'Chelsea', 'Spurs']})
+
+
+def sqlite_session(tmp_path):
+    backend = storage.SQLiteBackend(str(tmp_path / 'fpl.sqlite'))
+    conn, cursor = backend.connect()
+    backend.create_table(cursor, 'teams', TEAMS)
+    conn.commit()
+    return backend, conn, cursor
+
+
+def count_teams(cursor):
+    cursor.execute("SELECT COUNT(*) FROM teams")
+    return cursor.fetchone()[0]
+
+
+def test_sqlite_rollback_undoes_upsert(tmp_path):
+    backend, conn, cursor = sqlite_session(tmp_path)
+
+    counts = backend.upsert(cursor, 'teams', TEAMS, ['team_id'], batch_size=2)
+    assert counts['inserts'] == 3
+    assert conn.in_transaction
+
+    conn.rollback()
+    assert count_teams(cursor) == 0
+
+
+def test_sqlite_commit_keeps_upsert(tmp_path):
+    backend, conn, cursor = sqlite_session(tmp_path)
+
+    backend.upsert(cursor, 'teams', TEAMS, ['team_id'], batch_size=2)
+    conn.commit()
+    counts = backend.upsert(cursor, 'teams', TEAMS.assign(team_name='Renamed'), ['team_id'])
+    conn.rollback()
+
+    assert counts['updates'] == 3
+    cursor.execute("SELECT DISTINCT team_name FROM teams ORDER BY team_name")
+    assert cursor.fetchall() == [('Arsenal',), ('Chelsea',), ('Spurs',)]
+
+
+def test_oracle_export_dtypes_follow_the_column_types():
+    description = [
+        ('START_COST', oracledb.DB_TYPE_NUMBER, 6, None, 5, 0, True),
+        ('INFLUENCE', oracledb.DB_TYPE_NUMBER, 127, None, 126, -127, True),
+        ('TOTAL', oracledb.DB_TYPE_NUMBER, 127, None, 0, -127, True),
+        ('KICKOFF_TIME', oracledb.DB_TYPE_TIMESTAMP, 23, None, 0, 6, True),
+        ('WEB_NAME', oracledb.DB_TYPE_VARCHAR, 255, 255, None, None, True),
+    ]
+    assert storage.OracleBackend().export_dtypes(description) == ['int64', 'float64', None, 'datetime', 'object']
+
+
+def test_sqlite_delete_missing(tmp_path):
+    backend, conn, cursor = sqlite_session(tmp_path)
+    backend.upsert(cursor, 'teams', TEAMS, ['team_id'])
+
+    counts = backend.upsert(cursor, 'teams', TEAMS[TEAMS['team_id'] != 2], ['team_id'],
+                            strategy='staging', delete_missing=True)
+    conn.commit()
+
+    assert counts['deletes'] == 1
+    cursor.execute("SELECT team_id FROM teams ORDER BY team_id")
+    assert cursor.fetchall() == [(1,), (3,)]
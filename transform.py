@@ -0,0 +1,74 @@
+import pandas as pd
+from base_scrapper import encode_json
+from schemas import apply_schema
+
+"""
+Transforms run between extraction and load
+
+The getters of operations.py return typed frames, nested API fields are
+left as parsed. Here the chip plays of every gameweek become rows of
+their own chip_plays table and the remaining nested fields are stored
+as JSON text.
+"""
+
+# nested API fields stored as JSON text, per table
+JSON_COLUMNS = {
+    'gameweeks': ['top_player_info']
+}
+
+
+def json_column(series):
+    """
+    Function to serialize a column of lists / dicts to JSON in one pass
+
+    Args:
+        pandas series
+    Returns:
+        series of JSON text, None for missing or empty values
+    """
+    values = [encode_json(value) if isinstance(value, (list, dict)) and value else None
+              for value in series.tolist()]
+    return pd.Series(values, index=series.index, dtype=object)
+
+
+def chip_plays_frame(gameweeks):
+    """
+    Function to split the chip_plays lists of the gameweeks into rows
+
+    Args:
+        gameweeks dataframe with gameweek_id and chip_plays
+    Returns:
+        dataframe of gameweek_id, chip_name, num_played
+    """
+    rows = [(gameweek_id, chip['chip_name'], chip['num_played'])
+            for gameweek_id, chips in zip(gameweeks['gameweek_id'].tolist(), gameweeks['chip_plays'].tolist())
+            if isinstance(chips, list)
+            for chip in chips]
+    df = pd.DataFrame(rows, columns=['gameweek_id', 'chip_name', 'num_played'])
+
+    return apply_schema(df, 'chip_plays')
+
+
+def transform_tables(data):
+    """
+    Function to transform the extracted tables before they are loaded
+
+    Args:
+        dictionary of tables and their data, as returned by extract_flow
+    Returns:
+        new dictionary with chip_plays added, other entries are passed through
+    """
+    transformed = dict(data)
+
+    gameweeks = transformed.get('gameweeks')
+    if gameweeks is not None and 'chip_plays' in gameweeks.columns:
+        transformed['chip_plays'] = chip_plays_frame(gameweeks)
+        transformed['gameweeks'] = gameweeks.drop(columns='chip_plays')
+
+    for table_name, columns in JSON_COLUMNS.items():
+        df = transformed.get(table_name)
+        if df is not None:
+            transformed[table_name] = df.assign(**{col: json_column(df[col]) for col in columns
+                                                   if col in df.columns})
+
+    return transformed